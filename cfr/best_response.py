@@ -1,6 +1,8 @@
-from cfr.strategy_structures.realization_plan import RealizationPlan
+import numpy as np
+
+from cfr.strategy_structures.realization_plan import RealizationPlan, ArrayRealizationPlan
 from cfr.input_structures.game import Game
-from cfr.strategy_structures.behavioral import BehavioralStrategyProfile
+from cfr.input_structures.treeplex import Treeplex
 
 
 PLAYER = 0
@@ -19,49 +21,21 @@ def compute_best_response(player_id, player_type, game: Game, real_plan_other: R
     # compute gradient of player
     gradient = game.util_matrix.get_loss_vector(n_seq, other_type, real_plan_other)
 
-    infoset_values = {}
-    cur_treeplex.get_ordered_information_sets()
-
-    # compute a best response behavioral strategy profile
-    br_behavioral_strat_profile = BehavioralStrategyProfile(player_id)
-
-    # traverse the ordered infoset in reverse order -> reverse breadth-first
-    for infoset in cur_treeplex.information_sets[::-1]:
-        # compute the value of an infoset as the value of its best action
-        best_seq, best_val = None, None
-
-        for seq in infoset.get_children_as_list():
-            # reverse breadth-first => first infosets analysed don't have children
-            util_from_children = 0.0
-            for child_infoset in cur_treeplex.get_child_information_sets(seq):
-                util_from_children += infoset_values[child_infoset]
-
-            cur_val_seq = util_from_children + gradient[seq]
-
-            if best_val is None or cur_val_seq > best_val:
-                best_val = cur_val_seq
-                best_seq = seq
-
-        infoset_values[infoset] = best_val
-
-        # create the behavioral strategy
-        behavioral = dict()
-        behavioral[best_seq] = 1.0
+    return best_response_to_gradient(player_id, cur_treeplex, gradient.to_array(n_seq))
 
-        # all sub-optimal sequences must have null probability to be chosen
-        for seq in infoset.get_children_as_list():
-            if seq != best_seq:
-                behavioral[seq] = 0.0
 
-        # load behavior of the infoset
-        br_behavioral_strat_profile[infoset] = behavioral
+def best_response_to_gradient(player_id, treeplex: Treeplex, gradient: np.ndarray) -> (RealizationPlan, float):
+    """
+    Best response against the strategy of the other player that induces gradient (array indexed by sequence).
+    Lets a solver reuse the loss vectors it has already computed instead of marginalizing the utility matrix again
+    """
+    compiled = treeplex.compile()
 
-    # behavioral -> sequence
-    br_real_plan = br_behavioral_strat_profile.realization_plan(cur_treeplex)
+    # traverse the treeplex bottom-up taking the best sequence of each infoset, then behavioral -> sequence
+    br_strategy = compiled.best_response(gradient)
+    br_real_plan = ArrayRealizationPlan(player_id, compiled.realization_plan(br_strategy))
 
     # compute value associated to the best response
-    br_val = 0.0
-    for seq, prob in br_real_plan.items():
-        br_val += gradient.get_default(seq, 0.0) * prob
+    br_val = float(np.dot(gradient, br_real_plan.array))
 
     return br_real_plan, br_val
@@ -1,3 +1,5 @@
+import numpy as np
+
 import cfr.best_response as br
 from cfr.strategy_structures.realization_plan import RealizationPlan
 from cfr.input_structures.game import Game
@@ -12,15 +14,24 @@ def is_epsilon_nash(game: Game, real_plan_player: RealizationPlan, real_plan_opp
     return abs(diff) < SMALL_EPS
 
 
-def br_values_eps(game: Game, real_plan_player: RealizationPlan, real_plan_opponent: RealizationPlan, cur_iter):
+def br_values_eps(game: Game, real_plan_player: RealizationPlan, real_plan_opponent: RealizationPlan, cur_iter,
+                  gradient_player=None, gradient_opponent=None):
+    """
+    gradient_player and gradient_opponent are the optional loss vectors (arrays indexed by sequence) of player and
+    opponent against real_plan_opponent and real_plan_player: when given, the utility matrix is not read at all
+    """
     player = game.player_id
     opponent = game.opponent_id
 
-    br_player, _ = br.compute_best_response(player, br.PLAYER, game, real_plan_opponent)
-    br_opponent, _ = br.compute_best_response(opponent, br.OPPONENT, game, real_plan_player)
+    if gradient_player is not None and gradient_opponent is not None:
+        _, val_br_player = br.best_response_to_gradient(player, game.player_treeplex, gradient_player)
+        _, val_br_opponent = br.best_response_to_gradient(opponent, game.opponent_treeplex, gradient_opponent)
+    else:
+        br_player, _ = br.compute_best_response(player, br.PLAYER, game, real_plan_opponent)
+        br_opponent, _ = br.compute_best_response(opponent, br.OPPONENT, game, real_plan_player)
 
-    val_br_player = game.util_matrix.get_expected_utility(UtilMatrix.PLAYER, br_player, real_plan_opponent)
-    val_br_opponent = game.util_matrix.get_expected_utility(UtilMatrix.OPPONENT, br_opponent, real_plan_player)
+        val_br_player = game.util_matrix.get_expected_utility(UtilMatrix.PLAYER, br_player, real_plan_opponent)
+        val_br_opponent = game.util_matrix.get_expected_utility(UtilMatrix.OPPONENT, br_opponent, real_plan_player)
 
     den = cur_iter*(cur_iter+1)/2
     diff = val_br_player/den + val_br_opponent/den
@@ -28,3 +39,32 @@ def br_values_eps(game: Game, real_plan_player: RealizationPlan, real_plan_oppon
     assert diff > 0
 
     return diff
+
+
+def exploitability(game: Game, real_plan_player: RealizationPlan, real_plan_opponent: RealizationPlan,
+                   gradient_player=None, gradient_opponent=None):
+    """
+    Sum over the two players of what they gain by switching to a best response (NashConv), 0 at a Nash equilibrium.
+    Unlike br_values_eps, the value is not divided by the number of iterations.
+    The optional gradients are used as in br_values_eps
+    """
+    player = game.player_id
+    opponent = game.opponent_id
+
+    if gradient_player is not None and gradient_opponent is not None:
+        _, val_br_player = br.best_response_to_gradient(player, game.player_treeplex, gradient_player)
+        _, val_br_opponent = br.best_response_to_gradient(opponent, game.opponent_treeplex, gradient_opponent)
+
+        n_seq_player = game.player_treeplex.sequence_count
+        n_seq_opponent = game.opponent_treeplex.sequence_count
+        val_player = float(np.dot(gradient_player, real_plan_player.to_array(n_seq_player)))
+        val_opponent = float(np.dot(gradient_opponent, real_plan_opponent.to_array(n_seq_opponent)))
+    else:
+        _, val_br_player = br.compute_best_response(player, br.PLAYER, game, real_plan_opponent)
+        _, val_br_opponent = br.compute_best_response(opponent, br.OPPONENT, game, real_plan_player)
+
+        val_player = game.util_matrix.get_expected_utility(UtilMatrix.PLAYER, real_plan_player, real_plan_opponent)
+        val_opponent = game.util_matrix.get_expected_utility(UtilMatrix.OPPONENT, real_plan_opponent,
+                                                             real_plan_player)
+
+    return (val_br_player - val_player) + (val_br_opponent - val_opponent)
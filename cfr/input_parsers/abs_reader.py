@@ -1,4 +1,47 @@
 from abc import ABC, abstractmethod
+from cfr.input_structures.utility_matrix import UtilMatrix
+from cfr.input_parsers import game_cache
+from itertools import islice
+
+
+class LazySection:
+    """
+    Lines of a section of a file, from offset to the next section header or to the end of the file. The file is read
+    each time the section is iterated, one line at a time, so the section is never held in memory as a whole
+    """
+    def __init__(self, file_path, offset):
+        """
+        :param offset: position of the first line of the section as returned by tell, None if the file has no such
+        section
+        """
+        self._file_path = file_path
+        self._offset = offset
+
+    def __iter__(self):
+        if self._offset is None:
+            return
+
+        with open(self._file_path, 'r') as f:
+            f.seek(self._offset)
+            for line in f:
+                # delete empty lines and remove all special chars, like \n and \r
+                line = line.rstrip()
+                if line == "":
+                    continue
+                if line.find("###") != -1:
+                    return
+                yield line
+
+    def batches(self, batch_size):
+        """
+        Iterate over the lines in lists of at most batch_size lines
+        """
+        lines = iter(self)
+        while True:
+            batch = list(islice(lines, batch_size))
+            if not batch:
+                return
+            yield batch
 
 
 class AbstractReader(ABC):
@@ -7,6 +50,12 @@ class AbstractReader(ABC):
     SECTION_TREEPLEXES = 2
     SECTION_UTILITY = 3
 
+    # lines of the utility section parsed at once by the readers that work in batches
+    UTIL_BATCH_SIZE = 10000
+
+    # readers that can be built from the arrays of a game_cache file
+    SUPPORTS_CACHE = False
+
     CARDINAL_TO_PID = {
         'N': 0,
         'E': 1,
@@ -14,18 +63,28 @@ class AbstractReader(ABC):
         'W': 3
     }
 
-    def __init__(self, file_path, auto_read=True):
+    def __init__(self, file_path, auto_read=True, util_matrix_class=UtilMatrix, use_cache=False):
         """
         constructor
         :param file_path: path str of the file to read
         :param auto_read: if true reads the file on instantiation
+        :param util_matrix_class: utility matrix backend used by process_data, UtilMatrix or SparseUtilMatrix
+        :param use_cache: if true and the reader supports it, the parsed data is loaded from the binary cache next to
+        the file (see game_cache), which is written by the first parse
         """
         self._file_path = file_path
+        self._util_matrix_class = util_matrix_class
+
+        self._use_cache = use_cache and self.SUPPORTS_CACHE
+        self._cache_path = game_cache.cache_path_of(file_path)
+        self._source_hash = None
+        # (metadata, arrays) loaded from the cache, None if the text has to be parsed
+        self._cached = None
 
         self._info_section = []
         self._game_section = []
-        self._tree_section = []
-        self._util_section = []
+        self._tree_section = LazySection(file_path, None)
+        self._util_section = LazySection(file_path, None)
 
         super().__init__()
 
@@ -34,26 +93,52 @@ class AbstractReader(ABC):
 
     def read(self):
         """
-        Read file
+        Read file, or its cache when it is valid.
+        The treeplexes and utility sections are not loaded: _tree_section and _util_section stream their lines from the
+        file when iterated
         """
-        f = open(self._file_path, 'r')
-        lines = f.readlines()
-        f.close()
+        if self._use_cache:
+            self._source_hash = game_cache.source_hash(self._file_path)
+            self._cached = game_cache.load_cache(self._cache_path, self._source_hash)
+            if self._cached is not None:
+                return
 
-        # delete empty lines and remove all special chars, like \n and \r
-        lines = [line.rstrip() for line in lines if line.rstrip() != ""]
+        # info and game sections are small and kept in memory, the treeplexes and utility sections are only located
+        # here and streamed from the file by process_data. The first header opens the info section
+        sections = [[], []]
+        section_offsets = [None] * (AbstractReader.SECTION_UTILITY + 1)
+        cur_section = AbstractReader.SECTION_INFO - 1
+        with open(self._file_path, 'r') as f:
+            while True:
+                line = f.readline()
+                if line == "":
+                    break
 
-        section_indexes = []
-        for n, l in enumerate(lines):
-            if l.find("###") != -1:
-                section_indexes.append(n)
+                # delete empty lines and remove all special chars, like \n and \r
+                line = line.rstrip()
+                if line == "":
+                    continue
 
-        self._info_section = lines[1:section_indexes[AbstractReader.SECTION_GAME]]
-        self._game_section = lines[section_indexes[AbstractReader.SECTION_GAME] + 1:
-                                   section_indexes[AbstractReader.SECTION_TREEPLEXES]]
-        self._tree_section = lines[section_indexes[AbstractReader.SECTION_TREEPLEXES] + 1:
-                                   section_indexes[AbstractReader.SECTION_UTILITY]]
-        self._util_section = lines[section_indexes[AbstractReader.SECTION_UTILITY] + 1:]
+                if line.find("###") != -1:
+                    cur_section += 1
+                    if cur_section > AbstractReader.SECTION_GAME:
+                        section_offsets[cur_section] = f.tell()
+                    if cur_section == AbstractReader.SECTION_UTILITY:
+                        break
+                elif AbstractReader.SECTION_INFO <= cur_section <= AbstractReader.SECTION_GAME:
+                    sections[cur_section].append(line)
+
+        self._info_section = sections[AbstractReader.SECTION_INFO]
+        self._game_section = sections[AbstractReader.SECTION_GAME]
+        self._tree_section = LazySection(self._file_path, section_offsets[AbstractReader.SECTION_TREEPLEXES])
+        self._util_section = LazySection(self._file_path, section_offsets[AbstractReader.SECTION_UTILITY])
+
+    def _store_cache(self, metadata: dict, arrays: dict):
+        """
+        Write the parsed data to the cache of the file, if caching is enabled
+        """
+        if self._use_cache:
+            game_cache.write_cache(self._cache_path, self._source_hash, metadata, arrays)
 
     @abstractmethod
     def process_data(self):
@@ -1,12 +1,29 @@
+import numpy as np
+
 from cfr.input_parsers.abs_reader import AbstractReader
 from cfr.input_structures.game import Game
 from cfr.input_structures.information_set import InfoSet
 from cfr.input_structures.treeplex import Treeplex
-from cfr.input_structures.utility_matrix import UtilMatrix
 
 
 class BridgeReader(AbstractReader):
+    SUPPORTS_CACHE = True
+
     def process_data(self):
+        if self._cached is not None:
+            metadata, arrays = self._cached
+        else:
+            metadata, arrays = self._parse_sections()
+            self._store_cache(metadata, arrays)
+
+        return self._build_game(metadata, arrays)
+
+    def _parse_sections(self):
+        """
+        Parse the text sections into metadata and arrays, the format stored by the cache:
+        treeplex_<pid> holds the (first, last, father) triples of the infosets of pid in file order,
+        seqs, utils and chances the outcomes of the utility matrix as (declarer, defender) pairs
+        """
         # INFO SECTION
         n_players = int(self._info_section[1])
 
@@ -16,50 +33,83 @@ class BridgeReader(AbstractReader):
         defender = -1
 
         # TREEPLEX SECTION
-        treeplexes = {}
-        current_treeplex = None
-        infoset_count = None
+        infosets = {}
+        current_infosets = None
         for l in self._tree_section:
             if l.find("=== ") != -1:
-                if current_treeplex is not None:
-                    current_treeplex.set_empty_information_set(InfoSet(infoset_count,
-                                                               current_treeplex.empty_sequence,
-                                                               current_treeplex.empty_sequence, None))
                 x = l.split(' ')
                 pid = self.CARDINAL_TO_PID[x[1]]
                 # 2 player game
                 if pid != declarer:
                     defender = pid
-                treeplexes[pid] = Treeplex(pid)
-                current_treeplex = treeplexes[pid]
-                infoset_count = 0
+                infosets[pid] = []
+                current_infosets = infosets[pid]
                 # print(f"Found player {pid}")
             else:
                 x = l.split(' ')
-                current_treeplex.add_information_set(InfoSet(infoset_count, int(x[0]), int(x[1]), int(x[2])))
-                current_treeplex.set_empty_sequence(int(x[2]))
-                infoset_count += 1
-        current_treeplex.set_empty_information_set(InfoSet(infoset_count,
-                                                   current_treeplex.empty_sequence,
-                                                   current_treeplex.empty_sequence, None))
+                current_infosets.append((int(x[0]), int(x[1]), int(x[2])))
 
         # UTILITY MATRIX SECTION
         def team_of(player):
             return player % 2
 
-        util_matrix = UtilMatrix()
-        for l in self._util_section:
-            val = l.split(' ')
+        decl_util_col = team_of(declarer) + n_players
+        def_util_col = team_of(defender) + n_players
+
+        # the section is streamed: only one batch of lines is in memory at a time, as text
+        seqs = []
+        utils = []
+        chances = []
+        for batch in self._util_section.batches(self.UTIL_BATCH_SIZE):
+            rows = [l.split(' ') for l in batch]
             # format: seq_pl_N seq_pl_E seq_pl_S seq_pl_W team_NS_util team_EW_util chance
-            seq_decl = int(val[declarer])
-            seq_def = int(val[defender])
-            decl_util = int(val[team_of(declarer) + n_players])
-            def_util = int(val[team_of(defender) + n_players])
-            chance = float(val[len(val) - 1])
-            util_matrix[seq_decl, seq_def] = decl_util, def_util, chance
-
-        # creating game structure
-        assert defender != -1
-        game = Game(declarer, defender, treeplexes[declarer], treeplexes[defender], util_matrix)
-
-        return game
+            seqs.append(np.array([(int(val[declarer]), int(val[defender])) for val in rows], dtype=np.int32))
+            utils.append(np.array([(int(val[decl_util_col]), int(val[def_util_col])) for val in rows], dtype=np.int32))
+            chances.append(np.array([float(val[len(val) - 1]) for val in rows], dtype=np.float64))
+
+        metadata = {
+            'declarer': declarer,
+            'defender': defender,
+            'treeplex_pids': list(infosets.keys())
+        }
+        arrays = {
+            'seqs': np.concatenate(seqs).reshape(-1, 2) if seqs else np.empty((0, 2), dtype=np.int32),
+            'utils': np.concatenate(utils).reshape(-1, 2) if utils else np.empty((0, 2), dtype=np.int32),
+            'chances': np.concatenate(chances) if chances else np.empty(0, dtype=np.float64)
+        }
+        for pid, triples in infosets.items():
+            arrays[f'treeplex_{pid}'] = np.array(triples, dtype=np.int32).reshape(-1, 3)
+
+        return metadata, arrays
+
+    def _build_game(self, metadata, arrays):
+        return build_game(metadata, arrays, self._util_matrix_class)
+
+
+def build_game(metadata, arrays, util_matrix_class):
+    """
+    Build the game from the metadata and arrays returned by BridgeReader._parse_sections (or stored in its cache)
+    """
+    declarer = metadata['declarer']
+    defender = metadata['defender']
+
+    treeplexes = {}
+    for pid in metadata['treeplex_pids']:
+        treeplex = Treeplex(pid)
+        infoset_count = 0
+        for first, last, father in arrays[f'treeplex_{pid}'].tolist():
+            treeplex.add_information_set(InfoSet(infoset_count, first, last, father))
+            treeplex.set_empty_sequence(father)
+            infoset_count += 1
+        treeplex.set_empty_information_set(InfoSet(infoset_count, treeplex.empty_sequence,
+                                                   treeplex.empty_sequence, None))
+        treeplexes[pid] = treeplex
+
+    util_matrix = util_matrix_class()
+    util_matrix.set_outcomes(arrays['seqs'], arrays['utils'], arrays['chances'])
+
+    # creating game structure
+    assert defender != -1
+    game = Game(declarer, defender, treeplexes[declarer], treeplexes[defender], util_matrix)
+
+    return game
@@ -0,0 +1,118 @@
+"""
+Binary sidecar of a parsed input file, so that repeated solves of the same file skip the text parsing.
+
+Layout of a cache file:
+    MAGIC (8 bytes), header length (4 bytes, little endian), JSON header, padding, raw arrays
+The header holds the format version, the sha256 of the source file, reader specific metadata and, for each array, its
+dtype, shape and offset. Arrays are aligned to ALIGNMENT bytes and loaded as read-only memory maps.
+A cache whose version or source hash does not match is ignored (and rewritten by the reader).
+"""
+import hashlib
+import json
+import os
+import struct
+
+import numpy as np
+
+
+MAGIC = b"CFRGAME\0"
+VERSION = 1
+CACHE_SUFFIX = ".gamecache"
+ALIGNMENT = 64
+
+_LENGTH_FORMAT = "<I"
+
+
+def cache_path_of(file_path):
+    return file_path + CACHE_SUFFIX
+
+
+def source_hash(file_path):
+    """
+    sha256 of the content of file_path, as hex string
+    """
+    sha = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _aligned(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_cache(cache_path, src_hash, metadata: dict, arrays: dict):
+    """
+    Write metadata (JSON serializable) and arrays (name -> numpy array) to cache_path.
+    The file is written next to its final path and renamed, so readers never see a partial cache
+    """
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+
+    # array offsets are relative to the end of the header, which is aligned
+    array_info = {}
+    offset = 0
+    for name, array in arrays.items():
+        offset = _aligned(offset)
+        array_info[name] = [array.dtype.str, list(array.shape), offset]
+        offset += array.nbytes
+
+    header = json.dumps({
+        'version': VERSION,
+        'source_hash': src_hash,
+        'metadata': metadata,
+        'arrays': array_info
+    }).encode('utf-8')
+    data_start = _aligned(len(MAGIC) + struct.calcsize(_LENGTH_FORMAT) + len(header))
+
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack(_LENGTH_FORMAT, len(header)))
+        f.write(header)
+        for name, array in arrays.items():
+            f.seek(data_start + array_info[name][2])
+            f.write(array.tobytes())
+    os.replace(tmp_path, cache_path)
+
+
+def load_cache(cache_path, src_hash):
+    """
+    Return (metadata, arrays) stored in cache_path, None if the file is missing, corrupted or stale.
+    Arrays are read-only memory maps
+    """
+    if not os.path.isfile(cache_path):
+        return None
+
+    with open(cache_path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            return None
+        length_bytes = f.read(struct.calcsize(_LENGTH_FORMAT))
+        if len(length_bytes) != struct.calcsize(_LENGTH_FORMAT):
+            return None
+        header_length, = struct.unpack(_LENGTH_FORMAT, length_bytes)
+        try:
+            header = json.loads(f.read(header_length).decode('utf-8'))
+        except ValueError:
+            return None
+
+    if header.get('version') != VERSION or header.get('source_hash') != src_hash:
+        return None
+
+    data_start = _aligned(len(MAGIC) + struct.calcsize(_LENGTH_FORMAT) + header_length)
+    file_size = os.path.getsize(cache_path)
+
+    arrays = {}
+    for name, (dtype, shape, offset) in header['arrays'].items():
+        dtype = np.dtype(dtype)
+        shape = tuple(shape)
+        nbytes = int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+        if data_start + offset + nbytes > file_size:
+            return None
+        if nbytes == 0:
+            # empty arrays cannot be memory mapped
+            arrays[name] = np.empty(shape, dtype=dtype)
+        else:
+            arrays[name] = np.memmap(cache_path, dtype=dtype, mode='r', offset=data_start + offset, shape=shape)
+
+    return header['metadata'], arrays
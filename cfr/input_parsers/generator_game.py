@@ -0,0 +1,69 @@
+"""
+Game built directly from the structures returned by generator_relaxed (see main_playing_phase), without writing the
+output file and parsing it again with BridgeReader: useful to generate and solve many deals in a loop.
+The arrays are the same BridgeReader._parse_sections gets from the output file, so the game is the same too.
+"""
+import numpy as np
+
+from cfr.input_parsers.bridge_reader import build_game
+from cfr.input_structures.game import Game
+from cfr.input_structures.utility_matrix import UtilMatrix
+
+
+def generator_arrays(declarer, treeplexes, sequence_numbering, payoff_mat):
+    """
+    Convert the generator structures into the metadata and arrays of BridgeReader._parse_sections.
+    :param declarer: id of the declarer
+    :param treeplexes: player id -> generator Treeplex, in the order of the output file
+    :param sequence_numbering: player id -> (Sequence -> sequence id), for the players with a treeplex
+    :param payoff_mat: sequences of all the players -> ({team: utility}, chance)
+    """
+    defender = -1
+    for pid in treeplexes.keys():
+        # 2 player game
+        if pid != declarer:
+            defender = pid
+    assert defender != -1
+
+    def team_of(player):
+        return player % 2
+
+    decl_team = team_of(declarer)
+    def_team = team_of(defender)
+    decl_numbering = sequence_numbering[declarer]
+    def_numbering = sequence_numbering[defender]
+
+    seqs = []
+    utils = []
+    chances = []
+    for (sequences, (pay_dict, chance)) in payoff_mat.items():
+        seqs.append((decl_numbering[sequences[declarer]], def_numbering[sequences[defender]]))
+        utils.append((pay_dict[decl_team], pay_dict[def_team]))
+        chances.append(chance)
+
+    metadata = {
+        'declarer': declarer,
+        'defender': defender,
+        'treeplex_pids': list(treeplexes.keys())
+    }
+    arrays = {
+        'seqs': np.array(seqs, dtype=np.int32).reshape(-1, 2),
+        'utils': np.array(utils, dtype=np.int32).reshape(-1, 2),
+        'chances': np.array(chances, dtype=np.float64)
+    }
+    for pid, treeplex in treeplexes.items():
+        triples = [(infoset.start_sequence_id, infoset.end_sequence_id, infoset.parent_sequence_id)
+                   for infoset in treeplex.infosets]
+        arrays[f'treeplex_{pid}'] = np.array(triples, dtype=np.int32).reshape(-1, 3)
+
+    return metadata, arrays
+
+
+def game_from_generator(declarer, treeplexes, sequence_numbering, payoff_mat, util_matrix_class=UtilMatrix) -> Game:
+    """
+    Build the game of the structures returned by main_playing_phase, the same game BridgeReader reads from its output
+    file.
+    :param util_matrix_class: utility matrix backend, UtilMatrix or SparseUtilMatrix
+    """
+    metadata, arrays = generator_arrays(declarer, treeplexes, sequence_numbering, payoff_mat)
+    return build_game(metadata, arrays, util_matrix_class)
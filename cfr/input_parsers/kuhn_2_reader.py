@@ -34,7 +34,7 @@ class KuhnReader(AbstractReader):
                                                    current_treeplex.empty_sequence, None))
 
         # UTILITY MATRIX SECTION
-        util_matrix = UtilMatrix(utils_type=UtilMatrix.ZERO_SUM)
+        util_matrix = self._util_matrix_class(utils_type=UtilMatrix.ZERO_SUM)
         for l in self._util_section:
             val = l.split(' ')
             # format: seq_pl_N seq_pl_E seq_pl_S seq_pl_W team_NS_util team_EW_util chance
@@ -2,7 +2,6 @@ from cfr.input_parsers.abs_reader import AbstractReader
 from cfr.input_structures.game import Game
 from cfr.input_structures.information_set import InfoSet
 from cfr.input_structures.treeplex import Treeplex
-from cfr.input_structures.utility_matrix import UtilMatrix
 
 
 class LeducReader(AbstractReader):
@@ -34,7 +33,7 @@ class LeducReader(AbstractReader):
                                                    current_treeplex.empty_sequence, None))
 
         # UTILITY MATRIX SECTION
-        util_matrix = UtilMatrix()
+        util_matrix = self._util_matrix_class()
         for l in self._util_section:
             val = l.split(' ')
             # format: seq_pl_N seq_pl_E seq_pl_S seq_pl_W team_NS_util team_EW_util chance
@@ -0,0 +1,123 @@
+import numpy as np
+
+
+class CompiledTreeplex:
+    """
+    Flat array representation of an ordered treeplex, used by the vectorized regret minimizer.
+
+    Each infoset (the empty infoset included, as the last one) owns a contiguous range of sequences, so per-infoset
+    quantities are sums over the sequences mapped to the same infoset. The tree is split in levels by infoset depth:
+    every level holds the sequences of the infosets at that depth together with their father sequences, therefore a
+    bottom-up or top-down visit of the treeplex is one array pass per level.
+    """
+    def __init__(self, treeplex):
+        infosets = [infoset for infoset in treeplex.get_ordered_information_sets()
+                    if infoset != treeplex.empty_info_set]
+
+        self.sequence_count = treeplex.sequence_count
+        self.empty_sequence = treeplex.empty_sequence
+        # the empty infoset is the last one
+        self.info_set_count = len(infosets) + 1
+
+        # infoset offsets and father sequences (-1 for the empty infoset)
+        self.infoset_first = np.array([infoset.first_child_sequence for infoset in infosets] + [self.empty_sequence],
+                                      dtype=np.int64)
+        self.infoset_last = np.array([infoset.last_child_sequence for infoset in infosets] + [self.empty_sequence],
+                                     dtype=np.int64)
+        self.infoset_father = np.array([infoset.father_sequence for infoset in infosets] + [-1], dtype=np.int64)
+        self.infoset_size = self.infoset_last - self.infoset_first + 1
+
+        # infoset of each sequence
+        self.seq_infoset = np.full(self.sequence_count, self.info_set_count - 1, dtype=np.int64)
+        for idx, infoset in enumerate(infosets):
+            self.seq_infoset[infoset.first_child_sequence:infoset.last_child_sequence + 1] = idx
+
+        # depth of each infoset; infosets are ordered so that fathers come before children
+        depth_of_sequence = {self.empty_sequence: -1}
+        levels = []
+        for idx, infoset in enumerate(infosets):
+            depth = depth_of_sequence[infoset.father_sequence] + 1
+            for seq in infoset.get_children_as_list():
+                depth_of_sequence[seq] = depth
+            if depth == len(levels):
+                levels.append([])
+            levels[depth].append(idx)
+
+        # sequences of each level, in reversed infoset order and increasing sequence order inside an infoset:
+        # the same order used by Treeplex.subtree_utility, so the sums are carried out in the same order
+        self.level_sequences = []
+        self.level_fathers = []
+        # infosets of each level in the same order and offset of their first sequence in level_sequences
+        self.level_infosets = []
+        self.level_offsets = []
+        for level in levels:
+            seqs = [seq for idx in reversed(level) for seq in infosets[idx].get_children_as_list()]
+            seqs = np.array(seqs, dtype=np.int64)
+            self.level_sequences.append(seqs)
+            self.level_fathers.append(self.infoset_father[self.seq_infoset[seqs]])
+
+            level_infosets = np.array(level[::-1], dtype=np.int64)
+            self.level_infosets.append(level_infosets)
+            self.level_offsets.append(np.concatenate(([0], np.cumsum(self.infoset_size[level_infosets])[:-1])))
+
+    def infoset_sum(self, values):
+        """
+        Sum values (indexed by sequence) over the sequences of each infoset, in increasing sequence order
+        """
+        return np.bincount(self.seq_infoset, weights=values, minlength=self.info_set_count)
+
+    def uniform_strategy(self):
+        """
+        Behavioral strategy that gives the same probability to every sequence of an infoset
+        """
+        return (1.0 / self.infoset_size)[self.seq_infoset]
+
+    def subtree_utility(self, strategy, gradient):
+        """
+        Same as Treeplex.subtree_utility with a behavioral strategy and a gradient given as arrays indexed by sequence:
+        entry seq is the value obtained in the subtree that follows seq, 0 for terminal sequences
+        """
+        utility = np.zeros(self.sequence_count, dtype=np.float64)
+        # bottom-up: children levels are completed before their fathers are read
+        for seqs, fathers in zip(reversed(self.level_sequences), reversed(self.level_fathers)):
+            values = strategy[seqs] * (utility[seqs] + gradient[seqs])
+            utility += np.bincount(fathers, weights=values, minlength=self.sequence_count)
+        return utility
+
+    def best_response(self, gradient):
+        """
+        Pure behavioral strategy (as array) that maximizes the gradient summed over the reached sequences.
+        Same choices as the infoset by infoset visit of best_response.compute_best_response: the value of a sequence is
+        its gradient plus the values of its child infosets (added in infoset order), ties go to the lowest sequence
+        """
+        values = np.zeros(self.sequence_count, dtype=np.float64)
+        strategy = np.zeros(self.sequence_count, dtype=np.float64)
+        strategy[self.empty_sequence] = 1.0
+
+        # bottom-up: the values of the child infosets are completed before their fathers are read
+        for seqs, infosets, offsets in zip(reversed(self.level_sequences), reversed(self.level_infosets),
+                                           reversed(self.level_offsets)):
+            seq_values = values[seqs] + gradient[seqs]
+            best_values = np.maximum.reduceat(seq_values, offsets)
+
+            # position in the level of the first sequence of each infoset reaching the best value
+            positions = np.arange(len(seqs))
+            is_best = seq_values == np.repeat(best_values, self.infoset_size[infosets])
+            best_positions = np.minimum.reduceat(np.where(is_best, positions, len(seqs)), offsets)
+            strategy[seqs[best_positions]] = 1.0
+
+            # level infosets are in reversed order
+            values += np.bincount(self.infoset_father[infosets[::-1]], weights=best_values[::-1],
+                                  minlength=self.sequence_count)
+        return strategy
+
+    def realization_plan(self, strategy):
+        """
+        Realization plan (as array) induced by a behavioral strategy given as array indexed by sequence
+        """
+        plan = np.zeros(self.sequence_count, dtype=np.float64)
+        plan[self.empty_sequence] = 1.0
+        # top-down: fathers are computed before their children
+        for seqs, fathers in zip(self.level_sequences, self.level_fathers):
+            plan[seqs] = strategy[seqs] * plan[fathers]
+        return plan
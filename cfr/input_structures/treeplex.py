@@ -1,5 +1,6 @@
 from cfr.input_structures.information_set import InfoSet
-from cfr.strategy_structures.loss_vector import LossVector
+from cfr.input_structures.compiled_treeplex import CompiledTreeplex
+from cfr.strategy_structures.loss_vector import LossVector, ArrayLossVector
 from cfr.strategy_structures.behavioral import BehavioralStrategyProfile
 
 
@@ -25,6 +26,14 @@ class Treeplex:
         self.sequence_count = 0
         self.info_set_count = 0
 
+        # sequence -> infosets that follow it, id -> infoset
+        # kept up to date while infosets are added, so that lookups don't need to scan the infoset list
+        self._child_information_sets = {}
+        self._information_sets_by_id = {}
+
+        # flat array representation, built on demand by compile()
+        self._compiled = None
+
         self.is_ordered = False
 
     def set_empty_sequence(self, empty_seq: int):
@@ -42,6 +51,9 @@ class Treeplex:
         self.empty_info_set = empty_info_set
         self.information_sets.append(empty_info_set)
         self.info_set_count += 1
+        self._index_information_set(empty_info_set)
+        self.is_ordered = False
+        self._compiled = None
 
     def add_information_set(self, new_info_set: InfoSet):
         self.information_sets.append(new_info_set)
@@ -49,31 +61,43 @@ class Treeplex:
         last_seq_id = new_info_set.last_child_sequence
         if last_seq_id + 1 > self.sequence_count:
             self.sequence_count = last_seq_id + 1
+        self._index_information_set(new_info_set)
+        self.is_ordered = False
+        self._compiled = None
+
+    def _index_information_set(self, infoset: InfoSet):
+        """
+        Add the infoset to the father sequence -> children and id -> infoset maps
+        """
+        self._information_sets_by_id[infoset.i_id] = infoset
+        if infoset.father_sequence is not None:
+            self._child_information_sets.setdefault(infoset.father_sequence, []).append(infoset)
+
+    def _rebuild_index(self):
+        """
+        Rebuild the maps from the infoset list, children keep the order they have in the list
+        """
+        self._child_information_sets = {}
+        self._information_sets_by_id = {}
+        for infoset in self.information_sets:
+            self._index_information_set(infoset)
 
     def get_child_information_sets(self, sequence):
         """
         Return the information sets that follow the input sequence
         """
-        result = []
-        for infoset in self.information_sets:
-            if infoset.father_sequence is not None and infoset.father_sequence == sequence:
-                result.append(infoset)
-        return result
+        return list(self._child_information_sets.get(sequence, []))
 
     def has_sequence(self, seq_id):
         return seq_id < self.sequence_count
 
     def has_information_set(self, infoset_id: int):
-        for infoset in self.information_sets:
-            if infoset.id == infoset_id:
-                return True
-        return False
+        return infoset_id in self._information_sets_by_id
 
     def get_information_set_by_id(self, infoset_id: int):
-        for infoset in self.information_sets:
-            if infoset.id == infoset_id:
-                return infoset
-        raise LookupError
+        if infoset_id not in self._information_sets_by_id:
+            raise LookupError
+        return self._information_sets_by_id[infoset_id]
 
     def get_ordered_information_sets(self):
         """
@@ -91,15 +115,23 @@ class Treeplex:
             while to_explore:
                 father_infoset = to_explore.pop()
                 for seq in father_infoset.get_children_as_list():
-                    for child_infoset in self.get_child_information_sets(seq):
+                    for child_infoset in self._child_information_sets.get(seq, []):
                         # for each child sequence of father_infoset
                         to_explore.append(child_infoset)
-                        self.information_sets.remove(child_infoset)
                         ordered_infosets.append(child_infoset)
             self.information_sets = ordered_infosets
+            self._rebuild_index()
             self.is_ordered = True
         return self.information_sets
 
+    def compile(self) -> CompiledTreeplex:
+        """
+        Return the flat array representation of the treeplex. It is built once and kept until an infoset is added
+        """
+        if self._compiled is None:
+            self._compiled = CompiledTreeplex(self)
+        return self._compiled
+
     def subtree_utility(self, behavioral_plan: BehavioralStrategyProfile, gradient: LossVector):
         """
         Given a loss vector (utilities), compute a new gradient such that (seq, value) represents the value obtained in
@@ -108,33 +140,25 @@ class Treeplex:
         """
         assert self.player == behavioral_plan.player
 
-        utility = LossVector()
+        # lists are faster than arrays for element-wise access, the result is moved to an array at the end
+        utility = [0.0] * self.sequence_count
+        gradient_values = gradient.to_array(self.sequence_count).tolist()
 
         # visit ordered infosets in reversed breadth-first order
         if not self.is_ordered:
             self.get_ordered_information_sets()
 
         for infoset in self.information_sets[::-1]:
+            if infoset == self.empty_info_set:
+                continue
+            father_seq = infoset.father_sequence
+            behavior = behavioral_plan[infoset]
             for child_seq in infoset.get_children_as_list():
-                if infoset != self.empty_info_set:
-                    father_seq = infoset.father_sequence
-
-                    # get probability of choosing action child_seq from infoset
-                    prob_child = behavioral_plan[infoset][child_seq]
-
-                    # get utility of child_seq; returns 0 if not present
-                    util_child = utility.get_default(child_seq, 0.0)
-
-                    # get util of child_seq
-                    gradient_entry = gradient[child_seq]
-
-                    val = prob_child * (util_child + gradient_entry)
+                # probability of choosing action child_seq from infoset times the utility of its subtree (0 if terminal)
+                # plus its own gradient entry
+                utility[father_seq] += behavior[child_seq] * (utility[child_seq] + gradient_values[child_seq])
 
-                    if utility.contains_key(father_seq):
-                        utility[father_seq] += val
-                    else:
-                        utility[father_seq] = val
-        return utility
+        return ArrayLossVector(utility)
 
     def __str__(self):
         return ', '.join([str(info) for info in self.information_sets])
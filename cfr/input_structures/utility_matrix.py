@@ -1,4 +1,6 @@
-from cfr.strategy_structures.loss_vector import LossVector
+import numpy as np
+
+from cfr.strategy_structures.loss_vector import LossVector, ArrayLossVector
 from cfr.strategy_structures.realization_plan import RealizationPlan
 
 
@@ -30,6 +32,17 @@ class UtilMatrix:
     def __setitem__(self, key, value):
         self._set(key[0], key[1], value[0], value[1], value[2])
 
+    def set_outcomes(self, seqs, utils, chances):
+        """
+        Set many outcomes at once, same as setting them one by one in order
+        :param seqs: array (n, 2) of (seq_player, seq_opponent)
+        :param utils: array (n, 2) of (util_player, util_opponent)
+        :param chances: array (n) of chances
+        """
+        seqs_pl, seqs_opp = seqs[:, self.PLAYER].tolist(), seqs[:, self.OPPONENT].tolist()
+        utils_pl, utils_opp = utils[:, self.PLAYER].tolist(), utils[:, self.OPPONENT].tolist()
+        self._outcomes.update(zip(zip(seqs_pl, seqs_opp), zip(utils_pl, utils_opp, chances.tolist())))
+
     def _marginalize(self, player_to_marginalize, marg_realization_plan: RealizationPlan):
         """
         Given a player and his realization plan, return a loss vector with the other player's TERMINAL sequences as keys
@@ -69,13 +82,9 @@ class UtilMatrix:
         assert other_player == UtilMatrix.OPPONENT or other_player == UtilMatrix.PLAYER, \
             "player entry not valid, please use PLAYER or OPPONENT static variables"
         marginalized_loss = self._marginalize(other_player, other_realization_plan)
-        loss = LossVector()
 
         # cycle over all the sequences of the player
-        for seq in range(0, n_seq_remaining_player):
-            loss[seq] = marginalized_loss.get_default(seq, 0.0)
-
-        return loss
+        return ArrayLossVector([marginalized_loss.get_default(seq, 0.0) for seq in range(0, n_seq_remaining_player)])
 
     def get_expected_utility(self, player, real_player: RealizationPlan, real_other: RealizationPlan):
         assert player == UtilMatrix.OPPONENT or player == UtilMatrix.PLAYER, \
@@ -106,3 +115,134 @@ class UtilMatrix:
                     if utils[self.PLAYER] + utils[self.OPPONENT] != _sum:
                         return False
         return True
+
+
+class SparseUtilMatrix(UtilMatrix):
+    """
+    Utility matrix stored as COO arrays: one entry per outcome with the player's sequence (row), the opponent's
+    sequence (column), both utilities and the chance.
+    Marginalization is a single scatter-add over the arrays instead of a Python loop over the outcomes.
+    Outcomes are kept in insertion order and products are taken in the same order as UtilMatrix, therefore the
+    results are identical to the dict based matrix.
+    """
+    def __init__(self, utils_type=UtilMatrix.GENERAL_SUM):
+        super().__init__(utils_type)
+        # outcomes set one by one and blocks of outcomes (seqs, utils, chances) set since the last compilation,
+        # in insertion order: _pending always comes after the blocks
+        self._pending = []
+        self._pending_blocks = []
+
+        # _seqs[:, PLAYER] are the rows and _seqs[:, OPPONENT] the columns, same for _utils
+        self._seqs = np.empty((0, 2), dtype=np.int64)
+        self._utils = np.empty((0, 2), dtype=np.float64)
+        self._chances = np.empty(0, dtype=np.float64)
+
+    def _set(self, seq_pl, seq_opp, util_pl, util_opp, chance):
+        self._pending.append((seq_pl, seq_opp, util_pl, util_opp, chance))
+
+    def _flush_pending(self):
+        if self._pending:
+            pending = np.array(self._pending, dtype=np.float64).reshape(-1, 5)
+            self._pending = []
+            self._pending_blocks.append((pending[:, 0:2].astype(np.int64), pending[:, 2:4], pending[:, 4]))
+
+    def set_outcomes(self, seqs, utils, chances):
+        self._flush_pending()
+        self._pending_blocks.append((np.asarray(seqs, dtype=np.int64), np.asarray(utils, dtype=np.float64),
+                                     np.asarray(chances, dtype=np.float64)))
+
+    def _get(self, seq_pl, seq_opp):
+        self._compile()
+        match = np.flatnonzero((self._seqs[:, self.PLAYER] == seq_pl) & (self._seqs[:, self.OPPONENT] == seq_opp))
+        if len(match) == 0:
+            raise KeyError((seq_pl, seq_opp))
+        idx = match[0]
+        return float(self._utils[idx, self.PLAYER]), float(self._utils[idx, self.OPPONENT]), float(self._chances[idx])
+
+    def _compile(self):
+        """
+        Move the pending outcomes into the COO arrays.
+        As in a dict, an outcome set twice keeps its first position and its last value.
+        """
+        self._flush_pending()
+        if not self._pending_blocks:
+            return
+        blocks = self._pending_blocks
+        self._pending_blocks = []
+
+        seqs = np.concatenate([self._seqs] + [block[0] for block in blocks])
+        utils = np.concatenate([self._utils] + [block[1] for block in blocks])
+        chances = np.concatenate([self._chances] + [block[2] for block in blocks])
+        if len(chances) == 0:
+            return
+
+        keys = seqs[:, self.PLAYER] * (seqs[:, self.OPPONENT].max() + 1) + seqs[:, self.OPPONENT]
+        _, first = np.unique(keys, return_index=True)
+        if len(first) != len(keys):
+            # duplicated outcomes: keep the first position and the last value of each key
+            _, last = np.unique(keys[::-1], return_index=True)
+            last = len(keys) - 1 - last
+            order = np.argsort(first)
+            first, last = first[order], last[order]
+            seqs = seqs[first]
+            utils = utils[last]
+            chances = chances[last]
+
+        self._seqs, self._utils, self._chances = seqs, utils, chances
+
+    def _marginalize_array(self, player_to_marginalize, marg_realization_plan: RealizationPlan, size):
+        """
+        Same as _marginalize, but return a dense array of length size indexed by the other player's sequences
+        """
+        self._compile()
+        other = 1 - player_to_marginalize
+        marg_seqs = self._seqs[:, player_to_marginalize]
+        marg_probs = marg_realization_plan.to_array(marg_seqs.max() + 1 if len(marg_seqs) else 0)
+
+        # same evaluation order as UtilMatrix: (prob * utility) * chance, accumulated in outcome order
+        weights = marg_probs[marg_seqs] * self._utils[:, other] * self._chances
+        return np.bincount(self._seqs[:, other], weights=weights, minlength=size)[:size]
+
+    def _marginalize(self, player_to_marginalize, marg_realization_plan: RealizationPlan):
+        assert player_to_marginalize == UtilMatrix.OPPONENT or player_to_marginalize == UtilMatrix.PLAYER, \
+            "player entry not valid, please use PLAYER or OPPONENT static variables"
+        self._compile()
+        other_seqs = self._seqs[:, 1 - player_to_marginalize]
+        marginalized = self._marginalize_array(player_to_marginalize, marg_realization_plan,
+                                               other_seqs.max() + 1 if len(other_seqs) else 0).tolist()
+
+        # only the sequences found in the outcomes, in order of appearance
+        _, first = np.unique(other_seqs, return_index=True)
+        found = other_seqs[np.sort(first)].tolist()
+        return LossVector({seq: marginalized[seq] for seq in found})
+
+    def get_loss_vector(self, n_seq_remaining_player, other_player, other_realization_plan: RealizationPlan):
+        assert other_player == UtilMatrix.OPPONENT or other_player == UtilMatrix.PLAYER, \
+            "player entry not valid, please use PLAYER or OPPONENT static variables"
+        return ArrayLossVector(self._marginalize_array(other_player, other_realization_plan, n_seq_remaining_player))
+
+    def get_expected_utility(self, player, real_player: RealizationPlan, real_other: RealizationPlan):
+        assert player == UtilMatrix.OPPONENT or player == UtilMatrix.PLAYER, \
+            "player entry not valid, please use PLAYER or OPPONENT static variables"
+        self._compile()
+        if len(self._chances) == 0:
+            return 0.0
+
+        other = 1 - player
+        seqs_player = self._seqs[:, player]
+        seqs_other = self._seqs[:, other]
+        probs_player = real_player.to_array(seqs_player.max() + 1)
+        probs_other = real_other.to_array(seqs_other.max() + 1)
+
+        terms = probs_player[seqs_player] * probs_other[seqs_other] * self._utils[:, player] * self._chances
+        # cumsum adds the terms one after the other, like the loop of UtilMatrix
+        return float(np.cumsum(terms)[-1])
+
+    def check_util_sum(self):
+        self._compile()
+        sums = self._utils[:, self.PLAYER] + self._utils[:, self.OPPONENT]
+        if self.utils_type == self.ZERO_SUM:
+            return bool(np.all(sums == 0))
+        elif self.utils_type == self.CONST_SUM and len(sums) > 0:
+            return bool(np.all(sums == sums[0]))
+        return True
@@ -1,5 +1,8 @@
 from cfr.input_parsers.bridge_reader import BridgeReader
+from cfr.input_parsers.generator_game import game_from_generator
 from cfr.regret_algorithms.cfr import CFR
+from cfr.regret_algorithms.cfr_variants import SOLVERS
+from cfr.input_structures.utility_matrix import UtilMatrix
 from cfr.util import plotting as plt
 from cfr.util.tree_print import PrettyTree
 import os
@@ -11,17 +14,48 @@ dir_path = os.path.dirname(__file__)
 _DEBUG = False
 
 
-def run_bridge(file_path, iterations=500, add_prev_dir=True):
+def run_bridge(file_path, iterations=500, add_prev_dir=True, util_matrix_class=UtilMatrix, solver_class=CFR,
+               check_schedule=None, use_cache=False):
     """
 
     :param file_path: path starting from bridge-endgames folder, e.g. 'test_files/2_ranks/test0.txt'
     :param iterations: number of iterations if eps nash isn't met
+    :param util_matrix_class: utility matrix backend, UtilMatrix or SparseUtilMatrix
+    :param solver_class: CFR or one of its variants (see cfr_variants.SOLVERS)
+    :param check_schedule: when to compute the eps value (see util.check_schedule), after every iteration if None
+    :param use_cache: load the game from the binary cache next to the file, written by the first parse
     """
-    reader = BridgeReader(os.path.join(dir_path, ("../" if add_prev_dir else "")+file_path))
+    reader = BridgeReader(os.path.join(dir_path, ("../" if add_prev_dir else "")+file_path),
+                          util_matrix_class=util_matrix_class, use_cache=use_cache)
     game = reader.process_data()
 
-    cfr = CFR(game, iterations)
-    player_plan, opponent_plan = cfr.solve()
+    return solve_game(game, iterations, solver_class, check_schedule)
+
+
+def run_generated_bridge(n_players, ranks, bid, declarer, hands, iterations=500, util_matrix_class=UtilMatrix,
+                         solver_class=CFR, check_schedule=None, write_output=False):
+    """
+    Generate the game of the hands with generator_relaxed and solve it, the game is handed over in memory.
+    :param n_players, ranks, bid, declarer, hands: parameters of main_playing_phase
+    :param write_output: also write the output file of the generator
+    Other parameters and return value as run_bridge
+    """
+    # imported here: the generator module sets up its log and output paths when imported
+    from generator_relaxed.bridge_playing_phase_relaxed_gen import main_playing_phase
+
+    treeplexes, sequence_numbering, payoff_mat = main_playing_phase(n_players, ranks, bid, declarer, hands,
+                                                                    verbose=False, write_output=write_output)
+    game = game_from_generator(declarer, treeplexes, sequence_numbering, payoff_mat, util_matrix_class)
+
+    return solve_game(game, iterations, solver_class, check_schedule)
+
+
+def solve_game(game, iterations=500, solver_class=CFR, check_schedule=None):
+    """
+    Solve a game with solver_class, return the plans and expected utilities of the two players (see run_bridge)
+    """
+    cfr = solver_class(game, iterations)
+    player_plan, opponent_plan = cfr.solve(check_schedule=check_schedule)
 
     if _DEBUG:
         player_tree = PrettyTree(game.player_treeplex, player_plan)
@@ -53,6 +87,12 @@ if __name__ == "__main__":
         pp, op, pu, ou = run_bridge(file_path, iterations)
         print(f"Declarer's expected utility is: {pu}")
         print(f"Defenders' expected utility is: {ou}")
+    elif len(args) == 4 and args[3] in SOLVERS.keys():
+        file_path = args[1]
+        iterations = int(args[2])
+        pp, op, pu, ou = run_bridge(file_path, iterations, solver_class=SOLVERS[args[3]])
+        print(f"Declarer's expected utility is: {pu}")
+        print(f"Defenders' expected utility is: {ou}")
     else:
         print("Please give the path to the file (as if you were in bridge_endgames folder) and, optionally, "
-              "the maximum number of iterations")
+              f"the maximum number of iterations and the solver ({', '.join(SOLVERS.keys())})")
@@ -1,8 +1,11 @@
+import numpy as np
+
 from cfr.regret_algorithms.regret_minimizer_sequence import TreeplexRegretMinimizer
-from cfr.strategy_structures.realization_plan import RealizationPlan
+from cfr.strategy_structures.realization_plan import ArrayRealizationPlan
 from cfr.input_structures.treeplex import Treeplex
 from cfr.input_structures.utility_matrix import UtilMatrix
-from cfr.util.verify_realization_plan import is_realization_plan_valid
+from cfr.util.verify_realization_plan import PlanValidation, CHECKED
+from cfr.util.check_schedule import CheckSchedule, EveryNIterations
 from cfr.util import plotting as plt
 import cfr.epsilon_nash_eq as eps
 from cfr.util.tree_print import PrettyTree
@@ -29,6 +32,18 @@ class CFR:
         self.cumulative_pl = {}
         self.cumulative_opp = {}
 
+        # last iteration performed by solve
+        self.iterations_done = 0
+
+    def _make_regret_minimizer(self, treeplex: Treeplex):
+        return TreeplexRegretMinimizer(treeplex)
+
+    def _discount_regrets(self, trm: TreeplexRegretMinimizer, _iter):
+        """
+        Called after each regret update of iteration _iter, discounted variants scale the regrets here
+        """
+        pass
+
     @staticmethod
     def _den(_iter):
         if _EXPONENTIAL_REGRET_UPDATE:
@@ -43,20 +58,30 @@ class CFR:
         else:
             return _val
 
-    def solve(self, break_if_low_eps=True, print_eps_values=False):
+    def solve(self, break_if_low_eps=True, print_eps_values=False, eps_function=eps.br_values_eps,
+              check_schedule: CheckSchedule = None, validation: PlanValidation = CHECKED):
+        """
+        Run CFR until the eps value of the average strategies is below eps.SMALL_EPS or the iterations are over.
+        eps_function(game, real_plan_player, real_plan_opponent, iteration, gradient_player=..., gradient_opponent=...)
+        computes the eps value. The gradients are the loss vectors against the average strategies, accumulated from the
+        loss vectors already computed for the regret updates, so checking needs no further pass on the utility matrix.
+        check_schedule decides after which iterations the eps value is computed, after every iteration by default.
+        validation decides which realization plans are checked, all of them by default
+        """
+        if check_schedule is None:
+            check_schedule = EveryNIterations(1)
+        check_schedule.reset()
+
         # init sequence-form regret minimizers
-        trm_player = TreeplexRegretMinimizer(self._treeplex_player)
-        trm_opponent = TreeplexRegretMinimizer(self._treeplex_opponent)
+        trm_player = self._make_regret_minimizer(self._treeplex_player)
+        trm_opponent = self._make_regret_minimizer(self._treeplex_opponent)
 
         n_seq_player = self._treeplex_player.sequence_count
         n_seq_opponent = self._treeplex_opponent.sequence_count
 
         # init strategies
-        cur_strat_profile_player = trm_player.suggest_strategy()
-        cur_strat_profile_opponent = trm_opponent.suggest_strategy()
-
-        cur_realization_plan_player = cur_strat_profile_player.realization_plan(self._treeplex_player)
-        cur_realization_plan_opponent = cur_strat_profile_opponent.realization_plan(self._treeplex_opponent)
+        cur_realization_plan_player = trm_player.suggest_realization_plan()
+        cur_realization_plan_opponent = trm_opponent.suggest_realization_plan()
 
         if _DEBUG:
             print("Init realization plan of player:")
@@ -68,40 +93,66 @@ class CFR:
         self.cumulative_pl = cur_realization_plan_player
         self.cumulative_opp = cur_realization_plan_opponent
 
-        avg_real_plan_player = RealizationPlan(self._player)
-        avg_real_plan_opponent = RealizationPlan(self._opponent)
+        # loss vectors against the init strategies, the one of the player is also used by the first regret update
+        loss_vector_player = self._util_matrix.get_loss_vector(n_seq_player, UtilMatrix.OPPONENT,
+                                                               cur_realization_plan_opponent)
+        loss_vector_opp = self._util_matrix.get_loss_vector(n_seq_opponent, UtilMatrix.PLAYER,
+                                                            cur_realization_plan_player)
+
+        # init cumulative loss vectors, weighted as the cumulative real plans of the other player
+        cumulative_loss_pl = loss_vector_player.to_array(n_seq_player).copy()
+        cumulative_loss_opp = loss_vector_opp.to_array(n_seq_opponent).copy()
 
+        avg_real_plan_player = ArrayRealizationPlan(self._player, size=n_seq_player)
+        avg_real_plan_opponent = ArrayRealizationPlan(self._opponent, size=n_seq_opponent)
+        avg_loss_pl = np.zeros(n_seq_player, dtype=np.float64)
+        avg_loss_opp = np.zeros(n_seq_opponent, dtype=np.float64)
+
+        self.iterations_done = 1
         for cur_iteration in range(2, self._iterations+1):
+            self.iterations_done = cur_iteration
 
-            # compute loss vectors by marginalizing the utility matrix
-            loss_vector_player = self._util_matrix.get_loss_vector(n_seq_player, UtilMatrix.OPPONENT,
-                                                                   cur_realization_plan_opponent)
-            # update regret minimizers
+            # update regret minimizers with the loss against the strategy of the opponent of the previous iteration
             trm_player.observe_loss(loss_vector_player)
-            cur_strat_profile_player = trm_player.suggest_strategy()
-            cur_realization_plan_player = cur_strat_profile_player.realization_plan(self._treeplex_player)
-            assert is_realization_plan_valid(cur_realization_plan_player, self._treeplex_player)
+            # the regrets observed now are those of the strategies of the previous iteration
+            self._discount_regrets(trm_player, cur_iteration - 1)
+            cur_realization_plan_player = trm_player.suggest_realization_plan()
+            assert validation.is_valid(cur_realization_plan_player, self._treeplex_player, cur_iteration)
 
             # repeat for opponent
             loss_vector_opp = self._util_matrix.get_loss_vector(n_seq_opponent, UtilMatrix.PLAYER,
                                                                 cur_realization_plan_player)
             trm_opponent.observe_loss(loss_vector_opp)
-            cur_strat_profile_opponent = trm_opponent.suggest_strategy()
-            cur_realization_plan_opponent = cur_strat_profile_opponent.realization_plan(self._treeplex_opponent)
-            assert is_realization_plan_valid(cur_realization_plan_opponent, self._treeplex_opponent)
+            self._discount_regrets(trm_opponent, cur_iteration - 1)
+            cur_realization_plan_opponent = trm_opponent.suggest_realization_plan()
+            assert validation.is_valid(cur_realization_plan_opponent, self._treeplex_opponent, cur_iteration)
+
+            # compute the loss vector of the player by marginalizing the utility matrix: it is observed by the next
+            # regret update and accumulated now
+            loss_vector_player = self._util_matrix.get_loss_vector(n_seq_player, UtilMatrix.OPPONENT,
+                                                                   cur_realization_plan_opponent)
 
             # update cumulative values
-            for seq, val in cur_realization_plan_player.items():
-                self.cumulative_pl[seq] += self._regret_update_val(val, cur_iteration)
-            for seq, val in cur_realization_plan_opponent.items():
-                self.cumulative_opp[seq] += self._regret_update_val(val, cur_iteration)
+            self.cumulative_pl.array += self._regret_update_val(cur_realization_plan_player.array, cur_iteration)
+            self.cumulative_opp.array += self._regret_update_val(cur_realization_plan_opponent.array, cur_iteration)
+            cumulative_loss_pl += self._regret_update_val(loss_vector_player.to_array(n_seq_player), cur_iteration)
+            cumulative_loss_opp += self._regret_update_val(loss_vector_opp.to_array(n_seq_opponent), cur_iteration)
+
+            if _DEBUG:
+                print("regrets player = " + str(trm_player.mean_regrets(cur_iteration)))
+                print("regrets opponent = " + str(trm_opponent.mean_regrets(cur_iteration)))
+                print(f"Iteration {cur_iteration} completed")
+
+            if not check_schedule.should_check(cur_iteration):
+                continue
 
             # PLOTTING EPSILON NASH
-            for seq, cumulative_value in self.cumulative_pl.items():
-                avg_real_plan_player[seq] = cumulative_value / self._den(cur_iteration)
-            for seq, cumulative_value in self.cumulative_opp.items():
-                avg_real_plan_opponent[seq] = cumulative_value / self._den(cur_iteration)
-            eps_value = eps.br_values_eps(self._game, avg_real_plan_player, avg_real_plan_opponent, cur_iteration)
+            np.divide(self.cumulative_pl.array, self._den(cur_iteration), out=avg_real_plan_player.array)
+            np.divide(self.cumulative_opp.array, self._den(cur_iteration), out=avg_real_plan_opponent.array)
+            np.divide(cumulative_loss_pl, self._den(cur_iteration), out=avg_loss_pl)
+            np.divide(cumulative_loss_opp, self._den(cur_iteration), out=avg_loss_opp)
+            eps_value = eps_function(self._game, avg_real_plan_player, avg_real_plan_opponent, cur_iteration,
+                                     gradient_player=avg_loss_pl, gradient_opponent=avg_loss_opp)
             eps_plotter = plt.EpsDifferencesPlotter.get_instance()
             eps_plotter.data_x.append(cur_iteration)
             eps_plotter.data_y.append(eps_value)
@@ -109,16 +160,15 @@ class CFR:
             if print_eps_values:
                 print(eps_value)
 
-            if _DEBUG:
-                print("regrets player = " + str(trm_player.mean_regrets(cur_iteration)))
-                print("regrets opponent = " + str(trm_opponent.mean_regrets(cur_iteration)))
-                print(f"Iteration {cur_iteration} completed")
-
             if eps_value < eps.SMALL_EPS and break_if_low_eps:
                 print(f"Reached eps nash after iteration {cur_iteration}, stopping process...")
                 break
 
-        assert is_realization_plan_valid(avg_real_plan_player, self._game.player_treeplex)
-        assert is_realization_plan_valid(avg_real_plan_opponent, self._game.opponent_treeplex)
+        # average strategies of the last iteration performed, it may not have been checked
+        np.divide(self.cumulative_pl.array, self._den(self.iterations_done), out=avg_real_plan_player.array)
+        np.divide(self.cumulative_opp.array, self._den(self.iterations_done), out=avg_real_plan_opponent.array)
+
+        assert validation.is_valid(avg_real_plan_player, self._game.player_treeplex)
+        assert validation.is_valid(avg_real_plan_opponent, self._game.opponent_treeplex)
 
         return avg_real_plan_player, avg_real_plan_opponent
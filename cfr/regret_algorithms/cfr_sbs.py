@@ -1,8 +1,10 @@
+import numpy as np
+
 from cfr.regret_algorithms.regret_minimizer_sequence import TreeplexRegretMinimizer
-from cfr.strategy_structures.realization_plan import RealizationPlan
+from cfr.strategy_structures.realization_plan import ArrayRealizationPlan
 from cfr.input_structures.treeplex import Treeplex
 from cfr.input_structures.utility_matrix import UtilMatrix
-from cfr.util.verify_realization_plan import is_realization_plan_valid
+from cfr.util.verify_realization_plan import PlanValidation, CHECKED
 from cfr.util import plotting as plt
 import cfr.epsilon_nash_eq as eps
 from cfr.util.tree_print import PrettyTree
@@ -15,8 +17,12 @@ class CFR:
     """
     CFR step by step
     """
-    def __init__(self, game, exponential_regret_update=True):
+    def __init__(self, game, exponential_regret_update=True, validation: PlanValidation = CHECKED):
+        """
+        validation decides after which iterations the realization plans are checked, after all of them by default
+        """
         self._exponential_regret_update = exponential_regret_update
+        self._validation = validation
         self._eps_reached = False
 
         self.iterations = 1
@@ -41,11 +47,8 @@ class CFR:
         self._n_seq_opponent = self._treeplex_opponent.sequence_count
 
         # init strategies
-        self._cur_strat_profile_player = self._trm_player.suggest_strategy()
-        self._cur_strat_profile_opponent = self._trm_opponent.suggest_strategy()
-
-        self._cur_realization_plan_player = self._cur_strat_profile_player.realization_plan(self._treeplex_player)
-        self._cur_realization_plan_opponent = self._cur_strat_profile_opponent.realization_plan(self._treeplex_opponent)
+        self._cur_realization_plan_player = self._trm_player.suggest_realization_plan()
+        self._cur_realization_plan_opponent = self._trm_opponent.suggest_realization_plan()
 
         if _DEBUG:
             print("Init realization plan of player:")
@@ -57,8 +60,8 @@ class CFR:
         self._cumulative_pl = self._cur_realization_plan_player
         self._cumulative_opp = self._cur_realization_plan_opponent
 
-        self._avg_real_plan_player = RealizationPlan(self._player)
-        self._avg_real_plan_opponent = RealizationPlan(self._opponent)
+        self._avg_real_plan_player = ArrayRealizationPlan(self._player, size=self._n_seq_player)
+        self._avg_real_plan_opponent = ArrayRealizationPlan(self._opponent, size=self._n_seq_opponent)
 
     def _den(self):
         if self._exponential_regret_update:
@@ -80,33 +83,29 @@ class CFR:
                                                                self._cur_realization_plan_opponent)
         # update regret minimizers
         self._trm_player.observe_loss(loss_vector_player)
-        cur_strat_profile_player = self._trm_player.suggest_strategy()
-        cur_realization_plan_player = cur_strat_profile_player.realization_plan(self._treeplex_player)
-        assert is_realization_plan_valid(cur_realization_plan_player, self._treeplex_player)
+        cur_realization_plan_player = self._trm_player.suggest_realization_plan()
+        assert self._validation.is_valid(cur_realization_plan_player, self._treeplex_player, self.iterations)
 
         # repeat for opponent
         loss_vector_opp = self._util_matrix.get_loss_vector(self._n_seq_opponent, UtilMatrix.PLAYER,
                                                             cur_realization_plan_player)
         self._trm_opponent.observe_loss(loss_vector_opp)
-        cur_strat_profile_opponent = self._trm_opponent.suggest_strategy()
-        cur_realization_plan_opponent = cur_strat_profile_opponent.realization_plan(self._treeplex_opponent)
-        assert is_realization_plan_valid(cur_realization_plan_opponent, self._treeplex_opponent)
+        cur_realization_plan_opponent = self._trm_opponent.suggest_realization_plan()
+        assert self._validation.is_valid(cur_realization_plan_opponent, self._treeplex_opponent,
+                                         self.iterations)
 
         # update cumulative values
-        for seq, val in cur_realization_plan_player.items():
-            self._cumulative_pl[seq] += self._regret_update_val(val)
-        for seq, val in cur_realization_plan_opponent.items():
-            self._cumulative_opp[seq] += self._regret_update_val(val)
+        self._cumulative_pl.array += self._regret_update_val(cur_realization_plan_player.array)
+        self._cumulative_opp.array += self._regret_update_val(cur_realization_plan_opponent.array)
 
-        for seq, cumulative_value in self._cumulative_pl.items():
-            self._avg_real_plan_player[seq] = cumulative_value / self._den()
-        for seq, cumulative_value in self._cumulative_opp.items():
-            self._avg_real_plan_opponent[seq] = cumulative_value / self._den()
+        np.divide(self._cumulative_pl.array, self._den(), out=self._avg_real_plan_player.array)
+        np.divide(self._cumulative_opp.array, self._den(), out=self._avg_real_plan_opponent.array)
 
         if _DEBUG:
             print(f"Iteration {self.iterations} completed")
 
-        assert is_realization_plan_valid(self._avg_real_plan_player, self._treeplex_player)
-        assert is_realization_plan_valid(self._avg_real_plan_opponent, self._treeplex_opponent)
+        assert self._validation.is_valid(self._avg_real_plan_player, self._treeplex_player, self.iterations)
+        assert self._validation.is_valid(self._avg_real_plan_opponent, self._treeplex_opponent,
+                                         self.iterations)
 
         return self._avg_real_plan_player, self._avg_real_plan_opponent, self._eps_reached
@@ -0,0 +1,67 @@
+"""
+CFR variants that converge faster than vanilla CFR. They share the game input and the solve loop of CFR (alternating
+updates: the opponent observes the strategy just computed by the player) and only change how regrets are accumulated
+and how strategies are averaged.
+"""
+from cfr.regret_algorithms.cfr import CFR
+from cfr.regret_algorithms.regret_minimizer_sequence import TreeplexRegretMinimizer
+from cfr.input_structures.treeplex import Treeplex
+
+
+class CFRPlus(CFR):
+    """
+    CFR+: regret-matching+ (negative regrets are stored as 0) and linear averaging, strategy of iteration t has weight t.
+    Unlike CFR, linear averaging is always used, whatever the value of _EXPONENTIAL_REGRET_UPDATE
+    """
+    def _make_regret_minimizer(self, treeplex: Treeplex):
+        return TreeplexRegretMinimizer(treeplex, floor_regrets=True)
+
+    @staticmethod
+    def _den(_iter):
+        return (_iter * (_iter + 1)) / 2
+
+    @staticmethod
+    def _regret_update_val(_val, _iter):
+        return _val * _iter
+
+
+class DCFR(CFR):
+    """
+    Discounted CFR (Brown and Sandholm, 2019).
+    After the regret update of iteration t, accumulated positive regrets are multiplied by t^alpha/(t^alpha+1) and
+    negative regrets by t^beta/(t^beta+1). Contributions to the average strategy are multiplied by (t/(t+1))^gamma at
+    every iteration, which is the same as giving weight t^gamma to the strategy of iteration t.
+    The default parameters are the ones suggested by the authors.
+    """
+    def __init__(self, game, iterations, alpha=1.5, beta=0.0, gamma=2.0):
+        super().__init__(game, iterations)
+        self._alpha = alpha
+        self._beta = beta
+        self._gamma = gamma
+
+        # _weight_sums[t-1] = sum of the weights of the first t iterations
+        self._weight_sums = [1.0]
+
+    def _make_regret_minimizer(self, treeplex: Treeplex):
+        return TreeplexRegretMinimizer(treeplex, floor_regrets=False)
+
+    def _discount_regrets(self, trm: TreeplexRegretMinimizer, _iter):
+        positive = _iter ** self._alpha
+        negative = _iter ** self._beta
+        trm.discount_regrets(positive / (positive + 1), negative / (negative + 1))
+
+    def _den(self, _iter):
+        while len(self._weight_sums) < _iter:
+            self._weight_sums.append(self._weight_sums[-1] + (len(self._weight_sums) + 1) ** self._gamma)
+        return self._weight_sums[_iter - 1]
+
+    def _regret_update_val(self, _val, _iter):
+        return _val * (_iter ** self._gamma)
+
+
+# solvers selectable by name
+SOLVERS = {
+    'cfr': CFR,
+    'cfr+': CFRPlus,
+    'dcfr': DCFR
+}
@@ -1,41 +1,85 @@
-from cfr.regret_algorithms.regret_minimizer_normal import RegretMinimizer
+import numpy as np
+
 from cfr.strategy_structures.behavioral import BehavioralStrategyProfile
 from cfr.strategy_structures.loss_vector import LossVector
+from cfr.strategy_structures.realization_plan import ArrayRealizationPlan
 from cfr.input_structures.treeplex import Treeplex
 
 
 class TreeplexRegretMinimizer:
     """
-    Sequence-form regret minimizer
+    Sequence-form regret minimizer.
+    Runs regret matching on every infoset at once: regrets and behavioral strategy are arrays indexed by sequence, and
+    the treeplex is visited through its compiled (flat array) representation, one array pass per tree level.
+    The updates are the same as running a RegretMinimizer on each infoset.
+
+    With floor_regrets (regret-matching+) negative regrets are stored as 0, otherwise they are accumulated and only the
+    positive part is used to compute the strategy.
     """
-    def __init__(self, treeplex: Treeplex):
+    def __init__(self, treeplex: Treeplex, floor_regrets=True):
         self._treeplex = treeplex
+        self._compiled = treeplex.compile()
+        self._floor_regrets = floor_regrets
 
-        # initialize a regret minimizer for each infoset
-        # infoset:rms
-        self._simplex_rms = {}
-        for infoset in self._treeplex.information_sets:
-            actions = infoset.get_children_as_list()
-            self._simplex_rms[infoset] = RegretMinimizer(actions)
+        # sequence:regret
+        self._regrets = np.zeros(self._compiled.sequence_count, dtype=np.float64)
+        # sequence:probability of being chosen at its infoset, starts uniform
+        self._strategy = self._compiled.uniform_strategy()
 
     def observe_loss(self, loss: LossVector):
-        subtree_util = self._treeplex.subtree_utility(self.suggest_strategy(), loss)
+        gradient = loss.to_array(self._compiled.sequence_count)
+        subtree_util = self._compiled.subtree_utility(self._strategy, gradient)
 
-        for infoset in self._treeplex.information_sets:
-            infoset_loss = LossVector()
-            for child_seq in infoset.get_children_as_list():
-                infoset_loss[child_seq] = loss[child_seq] + subtree_util.get_default(child_seq, 0.0)
+        # value of each sequence, and expected value of each infoset under the current strategy
+        seq_values = gradient + subtree_util
+        expected_values = self._compiled.infoset_sum(seq_values * self._strategy)
+
+        # regret update: add the value of each sequence minus the expected value of its infoset
+        regrets = self._regrets + seq_values - expected_values[self._compiled.seq_infoset]
+        if self._floor_regrets:
+            # if negative, store 0
+            np.maximum(regrets, 0.0, out=self._regrets)
+        else:
+            self._regrets = regrets
 
-            self._simplex_rms[infoset].observe_loss(infoset_loss)
+        self._strategy = self._strategy_from_regrets()
+
+    def discount_regrets(self, positive_factor, negative_factor):
+        """
+        Multiply the accumulated positive regrets by positive_factor and the negative ones by negative_factor.
+        Positive regrets of an infoset are all scaled by the same factor, so the current strategy doesn't change
+        """
+        self._regrets *= np.where(self._regrets > 0.0, positive_factor, negative_factor)
+
+    def _strategy_from_regrets(self):
+        """
+        Normalized positive regrets of each infoset, uniform distribution on infosets with no positive regret
+        """
+        positive_regrets = self._regrets if self._floor_regrets else np.maximum(self._regrets, 0.0)
+        regret_sums = self._compiled.infoset_sum(positive_regrets)
+        seq_sums = regret_sums[self._compiled.seq_infoset]
+
+        strategy = self._compiled.uniform_strategy()
+        positive = seq_sums > 0.0
+        strategy[positive] = positive_regrets[positive] / seq_sums[positive]
+        return strategy
 
     def suggest_strategy(self):
         behavioral_profile = BehavioralStrategyProfile(self._treeplex.player)
 
-        # call suggest_strategy for each infoset
-        for infoset, rms in self._simplex_rms.items():
-            behavioral_profile[infoset] = rms.suggest_strategy()
+        strategy = self._strategy.tolist()
+        for infoset in self._treeplex.information_sets:
+            behavioral_profile[infoset] = {seq: strategy[seq] for seq in infoset.get_children_as_list()}
 
         return behavioral_profile
 
+    def suggest_realization_plan(self):
+        """
+        Realization plan of the current strategy, same as suggest_strategy().realization_plan(treeplex)
+        """
+        return ArrayRealizationPlan(self._treeplex.player, self._compiled.realization_plan(self._strategy))
+
     def mean_regrets(self, iteration):
-        return sum(rm.max_regret() for rm in self._simplex_rms.values()) / iteration
\ No newline at end of file
+        max_regrets = np.zeros(self._compiled.info_set_count, dtype=np.float64)
+        np.maximum.at(max_regrets, self._compiled.seq_infoset, self._regrets)
+        return float(max_regrets.sum()) / iteration
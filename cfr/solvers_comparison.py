@@ -0,0 +1,53 @@
+"""
+Compare the CFR solvers on the bundled input files: for each file and solver, print the number of iterations needed to
+bring the exploitability of the average strategies below eps.SMALL_EPS, the exploitability reached and the time spent.
+
+Run from the main directory with 'python -m cfr.solvers_comparison [max_iterations]'
+"""
+from cfr.input_parsers.bridge_reader import BridgeReader
+from cfr.input_parsers.kuhn_2_reader import KuhnReader
+from cfr.input_parsers.leduc_2_reader import LeducReader
+from cfr.regret_algorithms.cfr_variants import SOLVERS
+import cfr.epsilon_nash_eq as eps
+import os
+import sys
+import time
+
+
+dir_path = os.path.dirname(__file__)
+
+INPUT_FILES = [
+    (KuhnReader, "input_files/output_kuhn_2.txt"),
+    (LeducReader, "input_files/output_leduc_2.txt"),
+    (LeducReader, "input_files/output_leduc_2_harder.txt"),
+    (BridgeReader, "input_files/PlayingGenOut_2019-09-04_19-22-44.txt"),
+    (BridgeReader, "input_files/PlayingGenOut_2019-09-18_10-24-26.txt"),
+    (BridgeReader, "input_files/PlayingGenOut_2019-09-16_11-49-25.txt"),
+    (BridgeReader, "input_files/PlayingGenOut_2019-09-16_15-54-10.txt"),
+]
+
+
+def _exploitability(game, real_plan_player, real_plan_opponent, _iteration, **gradients):
+    return eps.exploitability(game, real_plan_player, real_plan_opponent, **gradients)
+
+
+def compare_solvers(max_iterations=1000):
+    for reader_class, file_name in INPUT_FILES:
+        print(f"{file_name}:")
+        game = reader_class(os.path.join(dir_path, file_name)).process_data()
+        for name, solver_class in SOLVERS.items():
+            solver = solver_class(game, max_iterations)
+            start = time.time()
+            player_plan, opponent_plan = solver.solve(eps_function=_exploitability)
+            elapsed = time.time() - start
+            value = eps.exploitability(game, player_plan, opponent_plan)
+            reached = "" if value < eps.SMALL_EPS else " (not reached)"
+            print(f"\t{name}\titerations = {solver.iterations_done}{reached}, exploitability = {value:.5f}, "
+                  f"elapsed = {elapsed:.3f}s")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 2:
+        compare_solvers(int(sys.argv[1]))
+    else:
+        compare_solvers()
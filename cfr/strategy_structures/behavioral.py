@@ -1,4 +1,4 @@
-from cfr.strategy_structures.realization_plan import RealizationPlan
+from cfr.strategy_structures.realization_plan import ArrayRealizationPlan
 
 
 class BehavioralStrategyProfile:
@@ -20,22 +20,22 @@ class BehavioralStrategyProfile:
         """
         Return the realization plan corresponding to this strategy
         """
-        realization_plan = RealizationPlan(self.player)
+        # probabilities are filled in a list and moved to the array at the end, list indexing is faster in the loop
+        probabilities = [0.0] * treeplex.sequence_count
 
         ordered_infosets = treeplex.get_ordered_information_sets()
 
         for infoset in ordered_infosets:
             if infoset == treeplex.empty_info_set:
                 # empty seq has 100% probability of being chosen
-                realization_plan[treeplex.empty_sequence] = 1.0
+                probabilities[treeplex.empty_sequence] = 1.0
             else:
                 # seq prob = father's prob * behavior of the parent infoset
-                father_seq = infoset.father_sequence
+                behavior = self._strategies[infoset]
+                father_prob = probabilities[infoset.father_sequence]
                 for child_seq in infoset.get_children_as_list():
-                    behavioral_prob = self._strategies[infoset][child_seq]
-                    father_prob = realization_plan[father_seq]
-                    realization_plan[child_seq] = behavioral_prob * father_prob
-        return realization_plan
+                    probabilities[child_seq] = behavior[child_seq] * father_prob
+        return ArrayRealizationPlan(self.player, probabilities)
 
     def __str__(self):
         return ", ".join([f"{infoset}: {behavior}" for infoset, behavior in self._strategies])
@@ -1,6 +1,7 @@
 """
 Loss = Utility after fixing the strategy of the other player
 """
+import numpy as np
 
 
 class LossVector:
@@ -25,6 +26,12 @@ class LossVector:
     def items(self):
         return self._entries.items()
 
+    def to_array(self, size):
+        """
+        Returns a float64 array of the given size indexed by sequence, missing sequences are 0
+        """
+        return np.array([self._entries.get(seq, 0.0) for seq in range(size)], dtype=np.float64)
+
     def __getitem__(self, item):
         return self._entries[item]
 
@@ -33,3 +40,44 @@ class LossVector:
 
     def __str__(self):
         return str(self._entries)
+
+
+class ArrayLossVector(LossVector):
+    """
+    Loss vector stored in a contiguous float64 array indexed by sequence id (0..size-1).
+    Every sequence in range is present, sequences never set have value 0
+    """
+    def __init__(self, entries=None, size=0):
+        super().__init__()
+        if entries is not None:
+            self.array = np.asarray(entries, dtype=np.float64)
+        else:
+            self.array = np.zeros(size, dtype=np.float64)
+
+    def contains_key(self, key):
+        return 0 <= key < len(self.array)
+
+    def get_default(self, key, default):
+        if 0 <= key < len(self.array):
+            return self.array.item(key)
+        return default
+
+    def items(self):
+        return enumerate(self.array.tolist())
+
+    def to_array(self, size):
+        if size == len(self.array):
+            return self.array
+        result = np.zeros(size, dtype=np.float64)
+        n = min(size, len(self.array))
+        result[:n] = self.array[:n]
+        return result
+
+    def __getitem__(self, item):
+        return self.array.item(item)
+
+    def __setitem__(self, key, value):
+        self.array[key] = value
+
+    def __str__(self):
+        return str(dict(self.items()))
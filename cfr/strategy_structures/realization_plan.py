@@ -1,3 +1,6 @@
+import numpy as np
+
+
 class RealizationPlan:
     """
     Dictionary that contains sequence:probability items
@@ -19,6 +22,12 @@ class RealizationPlan:
     def values(self):
         return self._distribution.values()
 
+    def to_array(self, size):
+        """
+        Returns a float64 array of the given size indexed by sequence, missing sequences have probability 0
+        """
+        return np.array([self._distribution.get(seq, 0.0) for seq in range(size)], dtype=np.float64)
+
     def __getitem__(self, item):
         return self._distribution[item]
 
@@ -38,3 +47,50 @@ class RealizationPlan:
 
     def __ne__(self, other):
         return not self == other
+
+
+class ArrayRealizationPlan(RealizationPlan):
+    """
+    Realization plan stored in a contiguous float64 array indexed by sequence id (0..size-1).
+    Every sequence in range is present, sequences never set have probability 0
+    """
+    def __init__(self, player, distribution=None, size=0):
+        super().__init__(player)
+        if distribution is not None:
+            self.array = np.asarray(distribution, dtype=np.float64)
+        else:
+            self.array = np.zeros(size, dtype=np.float64)
+
+    def get_default(self, key, default):
+        if 0 <= key < len(self.array):
+            return self.array.item(key)
+        return default
+
+    def items(self):
+        return enumerate(self.array.tolist())
+
+    def values(self):
+        return self.array.tolist()
+
+    def to_array(self, size):
+        if size == len(self.array):
+            return self.array
+        result = np.zeros(size, dtype=np.float64)
+        n = min(size, len(self.array))
+        result[:n] = self.array[:n]
+        return result
+
+    def __getitem__(self, item):
+        return self.array.item(item)
+
+    def __setitem__(self, key, value):
+        self.array[key] = value
+
+    def __str__(self):
+        return str(dict(self.items()))
+
+    def __eq__(self, other):
+        for seq, value in other.items():
+            if self.get_default(seq, None) != value:
+                return False
+        return True
@@ -0,0 +1,73 @@
+from abc import ABC, abstractmethod
+import time
+
+
+class CheckSchedule(ABC):
+    """
+    Decides after which iterations a solver computes the eps value of the average strategies.
+    Computing it costs two best responses, often more than the iteration itself, so on big games it pays off to check
+    less often
+    """
+    def reset(self):
+        """
+        Called by the solver before the first iteration
+        """
+        pass
+
+    @abstractmethod
+    def should_check(self, iteration) -> bool:
+        pass
+
+
+class EveryNIterations(CheckSchedule):
+    """
+    Check after every n-th iteration, n = 1 checks after every iteration
+    """
+    def __init__(self, n=1):
+        assert n >= 1
+        self._n = n
+
+    def should_check(self, iteration) -> bool:
+        return iteration % self._n == 0
+
+
+class GeometricSchedule(CheckSchedule):
+    """
+    Check after iterations first, first*ratio, first*ratio^2, ... (rounded down, at least one iteration apart)
+    """
+    def __init__(self, first=2, ratio=2.0):
+        assert first >= 1 and ratio > 1.0
+        self._first = first
+        self._ratio = ratio
+        self._next_check = first
+
+    def reset(self):
+        self._next_check = self._first
+
+    def should_check(self, iteration) -> bool:
+        if iteration < self._next_check:
+            return False
+
+        self._next_check = max(int(self._next_check * self._ratio), iteration + 1)
+        return True
+
+
+class TimeSchedule(CheckSchedule):
+    """
+    Check after the first iteration that ends at least seconds after the previous check (or after reset)
+    """
+    def __init__(self, seconds):
+        assert seconds >= 0
+        self._seconds = seconds
+        self._last_check = time.time()
+
+    def reset(self):
+        self._last_check = time.time()
+
+    def should_check(self, iteration) -> bool:
+        now = time.time()
+        if now - self._last_check < self._seconds:
+            return False
+
+        self._last_check = now
+        return True
@@ -24,3 +24,34 @@ def is_realization_plan_valid(realization_plan: RealizationPlan, treeplex: Treep
                 return False
 
     return True
+
+
+class PlanValidation:
+    """
+    Execution mode of the validation of the realization plans computed by the solvers.
+    every = 1 checks the plans of every iteration (checked mode), every = k > 1 only those of every k-th iteration,
+    every = 0 never checks them (unchecked mode, for production runs)
+    """
+    def __init__(self, every=1):
+        assert every >= 0
+        self._every = every
+
+    @property
+    def enabled(self):
+        return self._every > 0
+
+    def is_valid(self, realization_plan: RealizationPlan, treeplex: Treeplex, iteration=None):
+        """
+        Same as is_realization_plan_valid if iteration is sampled (iteration None is sampled unless validation is
+        disabled), True otherwise
+        """
+        if not self.enabled:
+            return True
+        if iteration is not None and iteration % self._every != 0:
+            return True
+
+        return is_realization_plan_valid(realization_plan, treeplex)
+
+
+CHECKED = PlanValidation(1)
+UNCHECKED = PlanValidation(0)
@@ -0,0 +1,43 @@
+"""
+Measure the time per iteration of CFR on the four-rank bridge input with the realization plans checked after every
+iteration, after every 10th iteration and never. The eps value is computed only at the end, so that the times differ
+only by the cost of the validation.
+
+Run from the main directory with 'python -m cfr.validation_benchmark [iterations]'
+"""
+from cfr.input_parsers.bridge_reader import BridgeReader
+from cfr.regret_algorithms.cfr import CFR
+from cfr.util.check_schedule import EveryNIterations
+from cfr.util.verify_realization_plan import PlanValidation, CHECKED, UNCHECKED
+import os
+import sys
+import time
+
+
+dir_path = os.path.dirname(__file__)
+
+INPUT_FILE = "input_files/PlayingGenOut_2019-09-16_15-54-10.txt"
+
+MODES = [
+    ("checked", CHECKED),
+    ("every 10", PlanValidation(10)),
+    ("unchecked", UNCHECKED),
+]
+
+
+def benchmark_validation(iterations=100):
+    game = BridgeReader(os.path.join(dir_path, INPUT_FILE)).process_data()
+    print(f"{INPUT_FILE}, {iterations} iterations:")
+    for name, validation in MODES:
+        solver = CFR(game, iterations)
+        start = time.time()
+        solver.solve(break_if_low_eps=False, check_schedule=EveryNIterations(iterations), validation=validation)
+        elapsed = time.time() - start
+        print(f"\t{name}\telapsed = {elapsed:.3f}s, per iteration = {1000 * elapsed / (iterations - 1):.3f}ms")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 2:
+        benchmark_validation(int(sys.argv[1]))
+    else:
+        benchmark_validation()
@@ -12,7 +12,9 @@ Given declarer + bid, how many tricks can his team win?
 
 from misc.game_structures import *
 import double_dummy.game.game_state as gs
+from double_dummy.game.bitboard_state import BitboardGameState
 from double_dummy.tree_exploration import ab_search
+from double_dummy.transposition_table import TranspositionTable, FlippedTable
 import time
 import statistics
 from typing import Dict
@@ -32,6 +34,10 @@ ERROR_ILLEGAL_HAND_OWNER = "You must specify a hand owner when giving only one p
 
 
 _DEBUG = True
+# search on BitboardGameState instead of GameState, same results with less overhead per move
+_USE_BITBOARD = True
+# find the number of tricks with mtdf_search instead of a single full window ab_search
+_USE_MTDF = True
 
 
 class DDAMatrix:
@@ -125,10 +131,6 @@ def _generate_game(hands, n_players: int, declarer: PlayerId, hand_owner: Player
         _check_hand_list(hands)
         ranks = len(hands[0])
 
-    teams = {0: Team(0), 1: Team(1)}
-    for j in range(n_players):
-        teams[j % 2].add_member(j)
-
     suits = {
         'c': Suit.clubs,
         'd': Suit.diamonds,
@@ -137,8 +139,55 @@ def _generate_game(hands, n_players: int, declarer: PlayerId, hand_owner: Player
         'n': Suit.notrump
     }
 
-    return gs.GameState(n_players, hands, ranks, suits[trump], declarer,
-                        teams[declarer % 2].get_other_member(declarer)), hands
+    state_class = BitboardGameState if _USE_BITBOARD else gs.GameState
+    return state_class(n_players, hands, ranks, suits[trump], declarer, _partner_of(declarer, n_players)), hands
+
+
+def _partner_of(declarer: PlayerId, n_players: int) -> PlayerId:
+    """
+    Partner of the declarer, -1 if he plays alone
+    """
+    teams = {0: Team(0), 1: Team(1)}
+    for j in range(n_players):
+        teams[j % 2].add_member(j)
+    return teams[declarer % 2].get_other_member(declarer)
+
+
+def mtdf_search(game, first_guess=None, tt: TranspositionTable = None, use_bounds=True) -> int:
+    """
+    MTD(f): find the tricks won by the declarer team with a sequence of zero window searches, each one answering
+    "does the declarer team win at least beta tricks?". Every answer moves the lower or the upper bound of the result
+    until they meet. The searches share the transposition table, so each one reuses the bounds stored by the previous
+    ones.
+    :param game: game state
+    :param first_guess: expected result, the closer it is the fewer searches are needed. Middle of the possible results
+    if None
+    :param tt: transposition table, a new one if None
+    :param use_bounds: passed to ab_search
+    :return: same value as ab_search(game)
+    """
+    if tt is None:
+        tt = TranspositionTable()
+
+    won = game.get_declarer_tricks()
+    lower, upper = won, won + game.get_remaining_tricks()
+    guess = (lower + upper) // 2 if first_guess is None else first_guess
+
+    while lower < upper:
+        beta = max(guess, lower + 1)
+        # fail-soft: a value < beta is an upper bound, a value >= beta a lower bound
+        guess = ab_search(game, beta - 1, beta, tt, use_bounds=use_bounds)
+        if guess < beta:
+            upper = guess
+        else:
+            lower = guess
+    return lower
+
+
+def _solve(game) -> int:
+    if _USE_MTDF:
+        return mtdf_search(game)
+    return ab_search(game, tt=TranspositionTable(), use_bounds=True)
 
 
 def dda_simple(hands, n_players: int, trump: str, declarer: PlayerId, hand_owner=-1, times=1, debug=True):
@@ -166,13 +215,40 @@ def dda_simple(hands, n_players: int, trump: str, declarer: PlayerId, hand_owner
         if debug:
             print(f"Game {i}")
         game, _ = _generate_game(hands, n_players, declarer, hand_owner, trump)
-        result_array.append(ab_search(game))
+        result_array.append(_solve(game))
     result = statistics.mean(result_array)
     if debug:
         print(f"DDA analysis completed. The value is: {result}")
     return result
 
 
+def dda_table(hands, n_players: int) -> DDAMatrix:
+    """
+    Complete DDA of a deal whose hands are all known: the result of every declarer in every strain.
+    The games of a strain differ only by the player on lead and by which team is the max team, so the declarers of a
+    strain share one transposition table (read through a FlippedTable by the declarers of team 1) and each result is
+    the first guess of the mtdf_search of the next declarer.
+    :param hands: dict player id -> list of cards, all the hands (not checked)
+    :param n_players: number of players.
+    :return: DDAMatrix object containing the results, see dda_extended.
+    """
+    ranks = n_players * len(hands[0]) // 4
+    state_class = BitboardGameState if _USE_BITBOARD else gs.GameState
+
+    result_mat = DDAMatrix(n_players)
+    for trump in Suit:
+        # bounds on the tricks of team 0
+        tt = TranspositionTable()
+        guess = None
+        for declarer in range(n_players):
+            game = state_class(n_players, hands, ranks, trump, declarer, _partner_of(declarer, n_players))
+            result = mtdf_search(game, guess, tt if declarer % 2 == 0 else FlippedTable(tt))
+            result_mat[declarer, trump.to_char()] = result
+            # the next declarer is in the other team
+            guess = game.get_remaining_tricks() - result
+    return result_mat
+
+
 def dda_extended(hands, n_players: int, hand_owner=-1, times=1):
     """
     Run alpha-beta search algorithm on multiple games. All games are analysed using the same hands, while each game has
@@ -187,7 +263,6 @@ def dda_extended(hands, n_players: int, hand_owner=-1, times=1):
     declarer id (0, 1, 2 or 3, if there are 4 players) and the trump ('c', 'd', 'h', 's' or 'n').
     """
     result_mat = DDAMatrix(n_players)
-    new_hands = None
     if len(hands) != 1:
         # if no sampling is needed, then it's useless to do multiple runs
         times = 1
@@ -196,15 +271,15 @@ def dda_extended(hands, n_players: int, hand_owner=-1, times=1):
     print("Processing...")
     for i in range(times):
         print(f"Game {i}")
+        # sample the hands once for all the declarer-trump combinations
+        _, new_hands = _generate_game(hands, n_players, 0, hand_owner, Suit.notrump.to_char())
+        table = dda_table(new_hands, n_players)
         for declarer in range(n_players):
             for trump in Suit:
-                game, new_hands = _generate_game(hands if new_hands is None else new_hands,
-                                                 n_players, declarer, hand_owner, trump.to_char())
-                result = ab_search(game)
+                result = table[declarer, trump.to_char()]
                 old = result_mat[declarer, trump.to_char()]
                 result_mat[declarer, trump.to_char()] = (old*i + result)/(i+1)
                 # print(f"old mean = {old}, new mean = {result_mat[declarer, trump.to_char()]}, result added = {result}, new count = {i+1}")
-        new_hands = None
     print(f"DDA analysis completed. The values are: {result_mat}")
     return result_mat
 
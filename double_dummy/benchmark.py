@@ -0,0 +1,190 @@
+"""
+Benchmark of the double dummy search variants on the deals of clustering_optimization_comparison.txt (6 ranks,
+notrump, North declarer, the setting that produced the results stored in the file).
+
+Run from the main directory with 'python -m double_dummy.benchmark [number_of_deals]' to compare the game states and
+the transposition table, with 'python -m double_dummy.benchmark orderings [trump] [number_of_deals]' to compare the
+move orderings (trump c, d, h, s or n, results are checked against the stored ones only in notrump).
+Every search prints its time and the nodes it visited.
+"""
+from misc.game_structures import import_multiple_hands, import_suit_from_char, Suit
+import double_dummy.game.game_state as gs
+from double_dummy.game.bitboard_state import BitboardGameState
+from double_dummy.tree_exploration import ab_search
+from double_dummy.algorithms import mtdf_search
+from double_dummy.transposition_table import TranspositionTable
+from double_dummy.move_ordering import MoveOrdering, WinningCardFirst, Ducking, TrumpManagement, HistoryHeuristic, \
+    default_ordering
+import copy
+import os
+import re
+import statistics
+import sys
+import time
+
+
+dir_path = os.path.dirname(__file__)
+
+DEALS_FILE = "clustering_optimization_comparison.txt"
+N_PLAYERS = 4
+DECLARER = 0
+TRUMP = Suit.notrump
+
+
+def load_deals(file_path):
+    """
+    Return the deals (dict player id -> list of cards) of a comparison file and the results stored for them
+    """
+    with open(file_path, 'r') as f:
+        lines = [line.strip() for line in f]
+
+    deals = []
+    results = []
+    for n, line in enumerate(lines):
+        if line.startswith("Processing iteration"):
+            # the hands follow an empty line, one per player in cardinal order
+            hands = [hand.rstrip(',') for hand in lines[n + 2:n + 2 + N_PLAYERS]]
+            deals.append(import_multiple_hands('/'.join(hands)))
+            results.append(None)
+        match = re.match(r"\w+\s+Result = (\d+)", line)
+        if match is not None and results and results[-1] is None:
+            results[-1] = int(match.group(1))
+    return deals, results
+
+
+class _CountingGameState(gs.GameState):
+    """
+    GameState that counts the nodes visited by the search
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.nodes = 0
+
+    def push_action(self, card_played):
+        self.nodes += 1
+        super().push_action(card_played)
+
+
+class _CountingBitboardGameState(BitboardGameState):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.nodes = 0
+
+    def push_action(self, card_played):
+        self.nodes += 1
+        super().push_action(card_played)
+
+
+def new_game(hands, trump=TRUMP):
+    hands = copy.deepcopy(hands)
+    return _CountingGameState(N_PLAYERS, hands, len(hands[0]), trump, DECLARER, (DECLARER + 2) % N_PLAYERS)
+
+
+def new_bitboard_game(hands, trump=TRUMP):
+    return _CountingBitboardGameState(N_PLAYERS, hands, len(hands[0]), trump, DECLARER, (DECLARER + 2) % N_PLAYERS)
+
+
+# searches: function(hands, trump) -> (result, nodes visited)
+
+def _plain(hands, trump):
+    game = new_game(hands, trump)
+    return ab_search(game), game.nodes
+
+
+def _transposition_table(hands, trump):
+    game = new_game(hands, trump)
+    return ab_search(game, tt=TranspositionTable()), game.nodes
+
+
+def _bitboard(hands, trump):
+    game = new_bitboard_game(hands, trump)
+    return ab_search(game), game.nodes
+
+
+def _bitboard_transposition_table(hands, trump):
+    game = new_bitboard_game(hands, trump)
+    return ab_search(game, tt=TranspositionTable()), game.nodes
+
+
+def _bitboard_transposition_table_bounds(hands, trump):
+    game = new_bitboard_game(hands, trump)
+    return ab_search(game, tt=TranspositionTable(), use_bounds=True), game.nodes
+
+
+def _mtdf(hands, trump):
+    game = new_bitboard_game(hands, trump)
+    return mtdf_search(game), game.nodes
+
+
+def _with_ordering(ordering_factory):
+    """
+    Bitboard search with transposition table and the ordering built by ordering_factory
+    """
+    def search(hands, trump):
+        game = new_bitboard_game(hands, trump)
+        return ab_search(game, tt=TranspositionTable(), ordering=ordering_factory()), game.nodes
+    return search
+
+
+SEARCHES = [
+    ("plain", _plain),
+    ("tt", _transposition_table),
+    ("bitboard", _bitboard),
+    ("bitboard+tt", _bitboard_transposition_table),
+    ("bitboard+tt+bounds", _bitboard_transposition_table_bounds),
+    ("mtdf", _mtdf),
+]
+
+ORDERINGS = [
+    ("none", _with_ordering(MoveOrdering)),
+    ("winning", _with_ordering(WinningCardFirst)),
+    ("ducking", _with_ordering(Ducking)),
+    ("trump", _with_ordering(TrumpManagement)),
+    ("history", _with_ordering(HistoryHeuristic)),
+    ("default", _with_ordering(default_ordering)),
+]
+
+
+def run_benchmark(searches, deals_number=None, trump=TRUMP):
+    """
+    Run every search on the deals and check that they agree (and match the stored results in notrump), print time and
+    nodes visited per deal and in total
+    """
+    deals, expected = load_deals(os.path.join(dir_path, DEALS_FILE))
+    if deals_number is not None:
+        deals, expected = deals[:deals_number], expected[:deals_number]
+
+    times = {name: [] for name, _ in searches}
+    nodes = {name: [] for name, _ in searches}
+    for idx, hands in enumerate(deals):
+        line = f"deal {idx}, expected = {expected[idx]}" if trump == TRUMP else f"deal {idx}"
+        results = []
+        for name, search in searches:
+            start = time.time()
+            result, visited = search(hands, trump)
+            times[name].append(time.time() - start)
+            nodes[name].append(visited)
+            results.append(result)
+            line += f"\t{name} = {times[name][-1]:.3f}s ({visited} nodes)"
+        assert len(set(results)) == 1, f"the searches disagree on deal {idx}: {results}"
+        if trump == TRUMP:
+            assert results[0] == expected[idx], f"deal {idx}: result {results[0]}, expected {expected[idx]}"
+        print(line if trump == TRUMP else f"{line}\tresult = {results[0]}")
+
+    for name, _ in searches:
+        print(f"{name}\ttotal = {sum(times[name]):.3f}s, mean = {statistics.mean(times[name]):.5f}s, "
+              f"nodes = {sum(nodes[name])}")
+
+
+if __name__ == '__main__':
+    # [orderings [trump]] [number_of_deals]
+    args = sys.argv[1:]
+    if len(args) > 0 and args[0] == "orderings":
+        args = args[1:]
+        trump = TRUMP
+        if len(args) > 0 and not args[0].isdigit():
+            trump = import_suit_from_char(args[0])
+            args = args[1:]
+        run_benchmark(ORDERINGS, int(args[0]) if args else None, trump)
+    else:
+        run_benchmark(SEARCHES, int(args[0]) if args else None)
@@ -0,0 +1,82 @@
+"""
+Bounds on the tricks won from the start of a trick onwards, used by ab_search to stop before searching a position.
+
+The player on lead can cash his quick tricks: the cards he holds on top of a suit (no card left in the game is higher)
+win one trick each and keep him on lead, as long as nobody can ruff them. So the team on lead wins at least the quick
+tricks of the leader and the other team at most the remaining tricks minus them.
+Hands are bitmasks of cards (see card_bit), as returned by get_position_key.
+"""
+from typing import List, Tuple
+from double_dummy.game.bitboard_state import SUIT_BITS
+from misc.game_structures import Suit
+
+
+_SUIT_MASK = (1 << SUIT_BITS) - 1
+
+
+def _count(mask) -> int:
+    return bin(mask).count('1')
+
+
+def _top_cards(leader_hand, suit_cards) -> int:
+    """
+    Number of the highest cards of suit_cards (the cards of a suit left in the game) held by the leader
+    """
+    count = 0
+    while suit_cards:
+        top = 1 << (suit_cards.bit_length() - 1)
+        if not leader_hand & top:
+            break
+        count += 1
+        suit_cards ^= top
+    return count
+
+
+def quick_tricks(hands: List[int], leader, opponents: List[int], trump: Suit) -> int:
+    """
+    Tricks that leader can cash at once.
+    In notrump, or if the opponents have no trumps left after the leader's top trumps are played, every top card is a
+    trick. Otherwise the top trumps are cashed first, then the top cards of one side suit, each one as long as every
+    opponent still holding trumps can follow
+    """
+    leader_hand = hands[leader]
+    all_cards = 0
+    for hand in hands:
+        all_cards |= hand
+
+    top = [_top_cards(leader_hand, all_cards & (_SUIT_MASK << (suit * SUIT_BITS))) for suit in range(4)]
+    if trump == Suit.notrump:
+        return sum(top)
+
+    trump_shift = trump * SUIT_BITS
+    # opponents that still hold trumps once the top trumps of the leader are played
+    ruffers = [p for p in opponents if _count((hands[p] >> trump_shift) & _SUIT_MASK) > top[trump]]
+    if not ruffers:
+        return sum(top)
+
+    side_tricks = 0
+    for suit in range(4):
+        if suit == trump:
+            continue
+        followers = min(_count((hands[p] >> (suit * SUIT_BITS)) & _SUIT_MASK) for p in ruffers)
+        side_tricks = max(side_tricks, min(top[suit], followers))
+    return top[trump] + side_tricks
+
+
+def trick_bounds(game) -> Tuple[int, int]:
+    """
+    (lower, upper) bounds on the tricks that the max team wins from the current position onwards, the position must be
+    at the start of a trick
+    """
+    key = game.get_position_key()
+    leader, hands = key[0], key[1:]
+    remaining = game.get_remaining_tricks()
+
+    max_team = (game.declarer_id, game.declarer_partner_id)
+    leader_is_max = leader in max_team
+    opponents = [p for p in range(game.n_players) if (p in max_team) != leader_is_max]
+
+    quick = quick_tricks(hands, leader, opponents, game.trump)
+    if leader_is_max:
+        return quick, remaining
+    return 0, remaining - quick
@@ -0,0 +1,62 @@
+"""
+Complete DDA tables (see dda_table in algorithms.py) of many deals, computed by a pool of processes. Each deal is
+solved by one worker and its table is returned as soon as it is done, so results can be written while the other deals
+are still being solved.
+
+Run from the main directory with 'python -m double_dummy.dda_batch deals_file n_players [processes]': deals_file
+contains one deal per line, in the format of import_multiple_hands (A:s,2:c/A:h,2:h/...). Every table is printed with
+the line number of its deal, in order of completion.
+"""
+from double_dummy.algorithms import dda_table, DDAMatrix
+from misc.game_structures import import_multiple_hands
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Iterator, Tuple
+import os
+import sys
+
+
+def dda_tables(deals, n_players: int, processes=None) -> Iterator[Tuple[int, DDAMatrix]]:
+    """
+    Yield (index of the deal, DDA table) for every deal, in order of completion.
+    :param deals: iterable of deals (dict player id -> list of cards, all the hands), read as the workers need them
+    :param n_players: number of players.
+    :param processes: number of worker processes, the number of cpus if None
+    """
+    if processes is None:
+        processes = os.cpu_count()
+    # deals submitted and not yet returned, enough to keep the workers busy without reading all the deals at once
+    max_pending = 2 * processes
+
+    pending = {}
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        for index, hands in enumerate(deals):
+            if len(pending) >= max_pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield pending.pop(future), future.result()
+            pending[executor.submit(dda_table, hands, n_players)] = index
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future.result()
+
+
+def _read_deals(file_path):
+    with open(file_path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line != '':
+                yield import_multiple_hands(line)
+
+
+if __name__ == '__main__':
+    args = sys.argv
+    if len(args) in (3, 4):
+        processes = int(args[3]) if len(args) == 4 else None
+        for idx, table in dda_tables(_read_deals(args[1]), int(args[2]), processes):
+            print(f"{idx}\t{table}", flush=True)
+    else:
+        print("Please give the following parameters:\n"
+              "deals_file n_players [processes]\n"
+              "deals_file contains one deal per line, in the format A:s,2:c/A:h,2:h/ {...}")
@@ -0,0 +1,162 @@
+"""
+DDA of a contract when only one hand is known: the hands of the other players are sampled, every sampled deal is
+solved and the results are aggregated. The deals are generated in batches by the calling process and solved by a pool
+of processes; the statistics of the results (mean, variance, distribution) are updated as the batches come back, so
+the sampling can stop as soon as the confidence interval of the mean is narrow enough.
+
+Run from the main directory with
+'python -m double_dummy.dda_sampling hand n_players trump declarer hand_owner max_samples [max_ci [processes]]'.
+"""
+from double_dummy.algorithms import mtdf_search, _partner_of, _check_hand_declarer, ERROR_INCOMPATIBLE_RANKS
+from double_dummy.game.bitboard_state import BitboardGameState
+from misc.game_structures import Card, Deck, PlayerId, Suit, import_single_hand, import_suit_from_char, CARDINAL_TO_PID
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, List
+import math
+import os
+import random
+import sys
+
+
+class TrickStatistics:
+    """
+    Online statistics of the tricks won in the sampled deals (Welford's algorithm for the variance)
+    """
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        # tricks -> number of deals
+        self.distribution = {}
+
+    def add(self, tricks: int):
+        self.count += 1
+        delta = tricks - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (tricks - self.mean)
+        self.distribution[tricks] = self.distribution.get(tricks, 0) + 1
+
+    @property
+    def variance(self) -> float:
+        """
+        Sample variance, 0 with less than two results
+        """
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def confidence_interval(self, z=1.96) -> float:
+        """
+        Half width of the confidence interval of the mean, z = 1.96 for 95% (normal approximation)
+        """
+        if self.count < 2:
+            return math.inf
+        return z * math.sqrt(self.variance / self.count)
+
+    def __str__(self):
+        distribution = ", ".join(f"{tricks}: {self.distribution[tricks]}" for tricks in sorted(self.distribution))
+        return f"samples = {self.count}, mean = {self.mean:.4f}, variance = {self.variance:.4f}, " \
+               f"ci = {self.confidence_interval():.4f}, distribution = {{{distribution}}}"
+
+
+def sample_deals(hand: List[Card], hand_owner: PlayerId, n_players: int, count: int, rng: random.Random) \
+        -> List[Dict[PlayerId, List[Card]]]:
+    """
+    Generate count deals where hand_owner holds hand and the other cards are dealt at random to the other players
+    """
+    ranks = n_players * len(hand) // 4
+    available_cards = sorted(set(Deck(ranks).cards) - set(hand))
+    hand_size = len(hand)
+
+    deals = []
+    for _ in range(count):
+        rng.shuffle(available_cards)
+        deal = {hand_owner: list(hand)}
+        start = 0
+        for player in range(n_players):
+            if player != hand_owner:
+                deal[player] = available_cards[start:start + hand_size]
+                start += hand_size
+        deals.append(deal)
+    return deals
+
+
+def _solve_deals(deals, n_players: int, trump: Suit, declarer: PlayerId) -> List[int]:
+    partner = _partner_of(declarer, n_players)
+    results = []
+    for hands in deals:
+        ranks = n_players * len(hands[0]) // 4
+        results.append(mtdf_search(BitboardGameState(n_players, hands, ranks, trump, declarer, partner)))
+    return results
+
+
+def sample_dda(hand: List[Card], n_players: int, trump: Suit, declarer: PlayerId, hand_owner: PlayerId,
+               max_samples=1000, max_ci=None, z=1.96, min_samples=30, batch_size=10, processes=None, seed=None) \
+        -> TrickStatistics:
+    """
+    Tricks won by the declarer team over deals sampled around the hand of hand_owner.
+    :param hand: cards of hand_owner
+    :param n_players: number of players.
+    :param trump: trump of the contract
+    :param declarer: id of the declarer.
+    :param hand_owner: id of the owner of the hand, can be different from the declarer.
+    :param max_samples: maximum number of deals solved
+    :param max_ci: stop when the half width of the confidence interval of the mean is at most max_ci (and at least
+    min_samples deals are solved), never stop early if None
+    :param z: quantile of the confidence interval, 1.96 for 95%
+    :param batch_size: deals solved by a worker in one task
+    :param processes: number of worker processes, the number of cpus if None
+    :param seed: seed of the sampling
+    :return: statistics of the solved deals
+    """
+    ranks = n_players * len(hand) / 4
+    assert ranks * 4 % n_players == 0 and ranks.is_integer(), ERROR_INCOMPATIBLE_RANKS
+    _check_hand_declarer(hand, ranks)
+    if processes is None:
+        processes = os.cpu_count()
+
+    rng = random.Random(seed)
+    stats = TrickStatistics()
+    submitted = 0
+    pending = set()
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        while True:
+            # keep two batches per worker in the queue
+            while submitted < max_samples and len(pending) < 2 * processes:
+                deals = sample_deals(hand, hand_owner, n_players, min(batch_size, max_samples - submitted), rng)
+                pending.add(executor.submit(_solve_deals, deals, n_players, trump, declarer))
+                submitted += len(deals)
+            if not pending:
+                break
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                for tricks in future.result():
+                    stats.add(tricks)
+
+            if max_ci is not None and stats.count >= min_samples and stats.confidence_interval(z) <= max_ci:
+                for future in pending:
+                    future.cancel()
+                break
+
+    return stats
+
+
+if __name__ == '__main__':
+    args = sys.argv
+    if 7 <= len(args) <= 9:
+        hand = import_single_hand(args[1])
+        n_players = int(args[2])
+        trump = import_suit_from_char(args[3])
+        assert args[4] in CARDINAL_TO_PID.keys(), "ERROR: invalid declarer, use N, E, S or W"
+        declarer = CARDINAL_TO_PID[args[4]]
+        assert args[5] in CARDINAL_TO_PID.keys(), "ERROR: invalid owner, use N, E, S or W"
+        owner = CARDINAL_TO_PID[args[5]]
+        max_samples = int(args[6])
+        max_ci = float(args[7]) if len(args) >= 8 else None
+        processes = int(args[8]) if len(args) == 9 else None
+
+        print(sample_dda(hand, n_players, trump, declarer, owner, max_samples, max_ci, processes=processes))
+    else:
+        print("Please give the following parameters:\n"
+              "hand n_players trump(c,d,h,s,n) declarer(N,E,S,W) hand_owner(N,E,S,W) max_samples [max_ci [processes]]\n"
+              "The hand shall be given in the format A:s,2:c,3:h {...}\n"
+              "Sampling stops early when the 95% confidence interval of the mean is narrower than +-max_ci")
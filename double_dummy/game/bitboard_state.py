@@ -0,0 +1,200 @@
+from typing import Dict, List
+from misc.game_structures import Card, PlayerId, Suit
+from double_dummy.game.game_state import card_bit
+
+
+SUIT_BITS = 13
+_SUIT_MASK = (1 << SUIT_BITS) - 1
+
+# every bit but the highest of each suit: cards whose next card (by strength) is in the same suit
+_NOT_SUIT_TOP = 0
+for _suit in range(4):
+    _NOT_SUIT_TOP |= (_SUIT_MASK >> 1) << (_suit * SUIT_BITS)
+
+
+class BitboardGameState:
+    """
+    Same game as GameState, with hands stored as bitmasks of cards (see card_bit): one integer per hand, 13 bits per
+    suit. The cards of the current trick, the player on lead and the tricks of the declaring team are plain integers
+    and lists kept on undo stacks, so push_action and pop_action do not create objects.
+
+    Actions are card bits instead of Card objects: use card_of to convert them. As in GameState, a player is only
+    offered the highest card of each group of cards of consecutive ranks he holds, since the others are equivalent.
+    """
+
+    def __init__(self, n_players, hands: Dict[PlayerId, List[Card]], ranks: int, trump: Suit, bid_winner_id=0,
+                 declarer_partner_id=-1):
+        self.ranks = int(ranks)
+        self.n_players = n_players
+        self.trump = trump
+        self.hands = [0] * n_players
+        for player, hand in hands.items():
+            for card in hand:
+                self.hands[player] |= 1 << card_bit(card, self.ranks)
+
+        self._leader = bid_winner_id
+        self._current = bid_winner_id
+        # card bits of the current trick, in order of play
+        self._trick = []
+        self._declarer_tricks = 0
+        self._cards_left = sum(len(hand) for hand in hands.values())
+        # (leader, cards) of the completed tricks, to undo them
+        self._tricks_history = []
+
+        # actions is a vector of (player_id, card_bit)
+        self.actions = []
+
+        self.declarer_id = bid_winner_id
+        self.declarer_partner_id = declarer_partner_id
+        # max_team[p] is True if p is the declarer or his partner
+        self._max_team = [p == bid_winner_id or p == declarer_partner_id for p in range(n_players)]
+
+    def card_of(self, bit) -> Card:
+        """
+        Card corresponding to a card bit
+        """
+        suit, strength = divmod(bit, SUIT_BITS)
+        return Card(Suit(suit), 1 if strength == self.ranks - 1 else strength + 2)
+
+    def get_current_player_id(self):
+        return self._current
+
+    def is_game_over(self) -> bool:
+        return self._cards_left == 0
+
+    def push_action(self, card_played: int):
+        player = self._current
+        self.actions.append((player, card_played))
+        self.hands[player] ^= 1 << card_played
+        self._cards_left -= 1
+        trick = self._trick
+        trick.append(card_played)
+
+        if len(trick) == self.n_players:
+            # turn ended
+            winner_id = (self._leader + self._find_winner_index(trick)) % self.n_players
+            if self._max_team[winner_id]:
+                self._declarer_tricks += 1
+            self._tricks_history.append((self._leader, trick))
+            self._leader = self._current = winner_id
+            self._trick = []
+        else:
+            self._current = (player + 1) % self.n_players
+
+    def pop_action(self):
+        if len(self.actions) == 0:
+            return 0
+        (popped_player_id, popped_card) = self.actions.pop()
+
+        if not self._trick:
+            # the card closed a trick: restore it
+            if self._max_team[self._leader]:
+                self._declarer_tricks -= 1
+            self._leader, self._trick = self._tricks_history.pop()
+
+        self._trick.pop()
+        self._cards_left += 1
+        self.hands[popped_player_id] |= 1 << popped_card
+        self._current = popped_player_id
+
+    def _find_winner_index(self, cards: List[int]) -> int:
+        """
+        Position in cards of the card that wins the trick: bits of the same suit compare as the cards
+        """
+        best_card = cards[0]
+        best_card_index = 0
+        for i in range(1, len(cards)):
+            card = cards[i]
+            if card // SUIT_BITS == best_card // SUIT_BITS:
+                if card > best_card:
+                    best_card, best_card_index = card, i
+            elif card // SUIT_BITS == self.trump:
+                # best card is of the leader suit
+                best_card, best_card_index = card, i
+        return best_card_index
+
+    def available_actions(self) -> List[int]:
+        """
+        Returns the card bits that the current player can play, highest first: the leader suit if he can follow,
+        any card otherwise. Only the highest card of each group of consecutive cards is returned
+        """
+        hand = self.hands[self._current]
+        if self._trick:
+            lead_shift = (self._trick[0] // SUIT_BITS) * SUIT_BITS
+            follow = hand & (_SUIT_MASK << lead_shift)
+            if follow != 0:
+                hand = follow
+
+        # cards whose next card in the same suit is not in the hand
+        tops = hand & ~((hand >> 1) & _NOT_SUIT_TOP)
+        result = []
+        while tops:
+            bit = tops.bit_length() - 1
+            result.append(bit)
+            tops ^= 1 << bit
+        return result
+
+    def get_trick(self) -> List[int]:
+        """
+        Return the card bits played in the current trick, in order of play (the list must not be modified)
+        """
+        return self._trick
+
+    def get_trick_winner(self):
+        """
+        Return (player, card bit) of the card that is winning the current trick, None if no card has been played yet
+        """
+        if not self._trick:
+            return None
+        best_card_index = self._find_winner_index(self._trick)
+        return (self._leader + best_card_index) % self.n_players, self._trick[best_card_index]
+
+    def is_max_player(self, player) -> bool:
+        return self._max_team[player]
+
+    def get_remaining_cards(self) -> int:
+        """
+        Return the bitmask of the cards still in the hands
+        """
+        result = 0
+        for hand in self.hands:
+            result |= hand
+        return result
+
+    def get_declarer_tricks(self):
+        """
+        Return the number of tricks won by the declarer team
+        """
+        return self._declarer_tricks
+
+    def is_max(self):
+        """
+        Return if it's the turn of the declaring team (max player for ab-search)
+        -> next action (push) will be made by max team
+        """
+        return self._max_team[self._current]
+
+    def is_trick_start(self) -> bool:
+        return not self._trick
+
+    def get_position_key(self):
+        """
+        Same key as GameState.get_position_key
+        """
+        return (self._current,) + tuple(self.hands)
+
+    def get_remaining_tricks(self) -> int:
+        """
+        Return the number of tricks still to be played, counting the current one
+        """
+        return bin(self.hands[self._current]).count('1')
+
+    def str_actions(self) -> str:
+        """
+        Create a string with the sequence of cards played during the game
+        :return: string with all actions played this game
+        """
+        s = ""
+        for (a, b) in self.actions:
+            s += f"Player{a+1} played {self.card_of(b)}, "
+        return s
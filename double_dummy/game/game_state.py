@@ -20,11 +20,24 @@ class TurnInfo:
         return s
 
 
+def card_bit(card: Card, ranks: int) -> int:
+    """
+    Position of a card in a bitmask of cards: 13 bits per suit (clubs first), inside a suit the cards are ordered by
+    strength starting from bit 0 (the 2), so the ace of a deck with ranks cards per suit is bit ranks-1
+    """
+    return card.suit * 13 + (ranks - 1 if card.rank == 1 else card.rank - 2)
+
+
 class Hand:
     """ Class used to generate clusters of cards. Clusters contain cards of consecutive ranks, same suit. """
-    def __init__(self, cards: List[Card]):
+    def __init__(self, cards: List[Card], ranks=None):
 
         self.ranks = len(cards)
+        # bitmask of the cards still in hand, see card_bit
+        self._deck_ranks = self.ranks if ranks is None else ranks
+        self.mask = 0
+        for card in cards:
+            self.mask |= 1 << card_bit(card, self._deck_ranks)
 
         # Dict of [suit, List[List[Card]], gives clusters for each suit in player's hand
         self._suits = {}
@@ -88,11 +101,13 @@ class Hand:
 
     def remove_played(self, card):
         self._remaining -= 1
+        self.mask &= ~(1 << card_bit(card, self._deck_ranks))
         cluster = self.card_to_cluster_dict[card]
         cluster.remove(card)
 
     def undo(self, card):
         self._remaining += 1
+        self.mask |= 1 << card_bit(card, self._deck_ranks)
         cluster = self.card_to_cluster_dict[card]
         cluster.append(card)
 
@@ -111,7 +126,7 @@ class GameState:
     """
 
     def __init__(self, n_players, hands: Dict[PlayerId, List[Card]], ranks: int, trump: Suit, bid_winner_id=0, declarer_partner_id=-1, reverse=True):
-        self.ranks = ranks
+        self.ranks = int(ranks)
         self.n_players = n_players
         self.trump = trump
         self.hands = {}
@@ -125,7 +140,7 @@ class GameState:
 
         for player, hand in hands.items():
             # print("Player clusters")
-            self.hands[player] = Hand(hand)
+            self.hands[player] = Hand(hand, self.ranks)
 
         self.turn_info = []
         tricks_won = {}
@@ -211,6 +226,26 @@ class GameState:
         result = self.hands[turn.current_player_id].get_available_actions(leader_suit).copy()
         return result
 
+    def is_trick_start(self) -> bool:
+        """
+        Return True if no card of the current trick has been played yet
+        """
+        return len(self.get_curr_turn_info().cards) == 0
+
+    def get_position_key(self):
+        """
+        Key of the current position at the start of a trick: player on lead and cards left in each hand (bitmasks).
+        Positions with the same key have the same future, whatever the cards played before and the tricks already won
+        """
+        return (self.get_current_player_id(),) + tuple(self.hands[p].mask for p in range(self.n_players))
+
+    def get_remaining_tricks(self) -> int:
+        """
+        Return the number of tricks still to be played, counting the current one
+        """
+        # the current player has not played in the current trick yet
+        return len(self.hands[self.get_current_player_id()])
+
     def get_declarer_tricks(self):
         """
         Return the number of tricks won by the declarer team
@@ -0,0 +1,167 @@
+"""
+Move ordering for the alpha-beta search. The value found by ab_search does not depend on the order in which the
+actions are tried, but the number of cutoffs does: the sooner the best action is tried, the smaller the tree.
+
+An ordering sorts the actions of a position by score, highest first; actions with the same score keep the order of
+available_actions (highest card first). The heuristics read the cards through the BitboardGameState interface, so they
+require a BitboardGameState (or a state exposing get_trick, get_trick_winner, get_remaining_cards and is_max_player).
+"""
+from double_dummy.game.bitboard_state import SUIT_BITS
+from misc.game_structures import Suit
+
+
+def _suit_of(card):
+    return card // SUIT_BITS
+
+
+def _strength_of(card):
+    return card % SUIT_BITS
+
+
+def _beats(card, best_card, trump):
+    """
+    True if card wins over best_card, the card that is currently winning the trick
+    """
+    if _suit_of(card) == _suit_of(best_card):
+        return card > best_card
+    return _suit_of(card) == trump
+
+
+def _is_master(game, card):
+    """
+    True if no card left in the game is higher than card in its suit
+    """
+    suit_end = (_suit_of(card) + 1) * SUIT_BITS
+    higher_cards = ((1 << suit_end) - 1) ^ ((1 << (card + 1)) - 1)
+    return game.get_remaining_cards() & higher_cards == 0
+
+
+def _wins(game, card, winner):
+    """
+    True if card takes the trick as things stand: it beats the winning card, or it is led and it is the highest card
+    of its suit
+    """
+    if winner is None:
+        return _is_master(game, card)
+    return _beats(card, winner[1], game.trump)
+
+
+class MoveOrdering:
+    """
+    Base ordering: keep the order of available_actions.
+    Subclasses define score; winner is game.get_trick_winner(), computed once per position by order
+    """
+    def score(self, game, action, winner):
+        return 0
+
+    def order(self, game, actions):
+        if len(actions) < 2:
+            return actions
+        winner = game.get_trick_winner()
+        return sorted(actions, key=lambda action: self.score(game, action, winner), reverse=True)
+
+    def cutoff(self, game, action):
+        """
+        Called by ab_search when action (already popped) caused a cutoff
+        """
+        pass
+
+
+class WinningCardFirst(MoveOrdering):
+    """
+    Try first the cards that take the trick as things stand
+    """
+    def score(self, game, action, winner):
+        return 1 if _wins(game, action, winner) else 0
+
+
+class Ducking(MoveOrdering):
+    """
+    When following: if the partner is winning the trick, or the card cannot win it, play the lowest card; if it can win,
+    win with the lowest card that does
+    """
+    def score(self, game, action, winner):
+        if winner is None:
+            return 0
+
+        partner_winning = game.is_max_player(winner[0]) == game.is_max()
+        if not partner_winning and _beats(action, winner[1], game.trump):
+            return SUIT_BITS - _strength_of(action)
+        # discard trumps last
+        trump_penalty = SUIT_BITS if _suit_of(action) == game.trump else 0
+        return -_strength_of(action) - trump_penalty
+
+
+class TrumpManagement(MoveOrdering):
+    """
+    Trump contracts only: lead trumps when holding the highest trump left (draw the opponents' trumps), ruff when the
+    opponents are winning a trick of another suit, do not ruff the partner's winner
+    """
+    def score(self, game, action, winner):
+        if game.trump == Suit.notrump:
+            return 0
+
+        is_trump = _suit_of(action) == game.trump
+        if winner is None:
+            return 1 if is_trump and _is_master(game, action) else 0
+
+        if not is_trump or _suit_of(game.get_trick()[0]) == game.trump:
+            return 0
+        partner_winning = game.is_max_player(winner[0]) == game.is_max()
+        if partner_winning:
+            return -1
+        return 1 if _beats(action, winner[1], game.trump) else -1
+
+
+class HistoryHeuristic(MoveOrdering):
+    """
+    Killer moves and history table learned during the search: the actions that caused a cutoff at the same depth
+    (the last KILLERS of them) come first, then the actions by number of cutoffs caused, weighted by the depth of the
+    subtree they cut
+    """
+    KILLERS = 2
+
+    def __init__(self):
+        # depth (cards played) -> last actions that caused a cutoff
+        self._killers = {}
+        # (player, action) -> score
+        self._history = {}
+
+    def score(self, game, action, winner):
+        player = game.get_current_player_id()
+        is_killer = action in self._killers.get(len(game.actions), ())
+        return is_killer, self._history.get((player, action), 0)
+
+    def cutoff(self, game, action):
+        depth = len(game.actions)
+        killers = self._killers.setdefault(depth, [])
+        if action not in killers:
+            killers.insert(0, action)
+            del killers[self.KILLERS:]
+
+        key = game.get_current_player_id(), action
+        # cutoffs close to the root save more nodes
+        remaining = game.get_remaining_tricks()
+        self._history[key] = self._history.get(key, 0) + remaining * remaining
+
+
+class CombinedOrdering(MoveOrdering):
+    """
+    Sort by the scores of several orderings, the first ordering decides and the others break ties
+    """
+    def __init__(self, *orderings: MoveOrdering):
+        self._orderings = orderings
+
+    def score(self, game, action, winner):
+        return tuple(ordering.score(game, action, winner) for ordering in self._orderings)
+
+    def cutoff(self, game, action):
+        for ordering in self._orderings:
+            ordering.cutoff(game, action)
+
+
+def default_ordering() -> MoveOrdering:
+    """
+    Ordering used by the DDA functions, a new one for each game since the history heuristic learns during the search
+    """
+    return CombinedOrdering(TrumpManagement(), WinningCardFirst(), Ducking(), HistoryHeuristic())
@@ -0,0 +1,85 @@
+"""
+Transposition table for the alpha-beta search.
+Positions are stored at the start of a trick, when the same cards left in the hands and the same player on lead can be
+reached through different orders of play. Since the tricks already won differ from path to path, the table stores
+bounds on the number of tricks the max team wins from the position onwards.
+"""
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+DEFAULT_MAX_ENTRIES = 1000000
+
+
+class TranspositionTable:
+    """
+    Map position key -> (lower bound, upper bound) on the tricks that the max team wins in the rest of the game.
+    The table holds at most max_entries positions, when it is full the least recently used one is replaced
+    """
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        assert max_entries > 0
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+        # statistics
+        self.lookups = 0
+        self.hits = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, key) -> Optional[Tuple[int, int]]:
+        """
+        Return the (lower, upper) bounds stored for key, None if the position is not in the table
+        """
+        self.lookups += 1
+        bounds = self._entries.get(key)
+        if bounds is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        return bounds
+
+    def store(self, key, lower: int, upper: int):
+        """
+        Add the bounds (lower, upper) to the position: they are intersected with the bounds already known
+        """
+        old = self._entries.get(key)
+        if old is not None:
+            lower = max(lower, old[0])
+            upper = min(upper, old[1])
+            self._entries.move_to_end(key)
+        elif len(self._entries) >= self.max_entries:
+            # replace the least recently used position
+            self._entries.popitem(last=False)
+        self._entries[key] = (lower, upper)
+
+    def clear(self):
+        self._entries.clear()
+        self.lookups = 0
+        self.hits = 0
+
+
+class FlippedTable:
+    """
+    View of a TranspositionTable from the side of the other team: the bounds of the max team are turned into bounds of
+    the min team (tricks left minus tricks won) when read and back when written.
+    Two games that differ only by which team is the max team, e.g. two declarers of different teams in the same strain,
+    can share a table this way. Keys must be position keys (player on lead and hand bitmasks)
+    """
+    def __init__(self, tt: TranspositionTable):
+        self._tt = tt
+
+    @staticmethod
+    def _remaining_tricks(key) -> int:
+        # cards left in the hand of the player on lead
+        return bin(key[1 + key[0]]).count('1')
+
+    def lookup(self, key) -> Optional[Tuple[int, int]]:
+        bounds = self._tt.lookup(key)
+        if bounds is None:
+            return None
+        remaining = self._remaining_tricks(key)
+        return remaining - bounds[1], remaining - bounds[0]
+
+    def store(self, key, lower: int, upper: int):
+        remaining = self._remaining_tricks(key)
+        self._tt.store(key, remaining - upper, remaining - lower)
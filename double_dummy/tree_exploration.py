@@ -3,14 +3,23 @@ In this file we define the alpha-beta pruning exploration algorithm. The goal is
 the starting team can make given the initial game state.
 """
 
-from double_dummy.game.game_state_old import GameState
+from double_dummy.game.game_state import GameState
+from double_dummy.transposition_table import TranspositionTable
+from double_dummy.move_ordering import MoveOrdering
+from double_dummy.bounds import trick_bounds
 
 
-def ab_search(game: GameState, alpha = -20, beta = 20) -> int:
+def ab_search(game: GameState, alpha=-20, beta=20, tt: TranspositionTable = None, ordering: MoveOrdering = None,
+              use_bounds=False) -> int:
     """
     Alpha-Beta search.
     The reward is limited to the interval [0,13], because Bridge has always 13 hands to play. We can therefore set alpha
     and beta to +-20 (or any interval that strictly contains 0,13).
+    The search is fail-soft: a result <= alpha is an upper bound of the value, a result >= beta a lower bound.
+    If a transposition table is given, positions at the start of a trick are looked up before being searched and
+    their bounds are stored after. If an ordering is given, it sorts the actions of every position and it is notified
+    of the actions that cause a cutoff. With use_bounds, positions at the start of a trick are not searched when the
+    quick tricks bounds (see bounds.py) are already outside the window.
     """
 
     # if the game is over (leaf node), return the number of tricks won by Max
@@ -19,33 +28,75 @@ def ab_search(game: GameState, alpha = -20, beta = 20) -> int:
         # print(f"Leaf node reached: actions = {game.str_actions()}\n\tvalue = {game.get_declarer_tricks()}, alpha = {alpha}, beta = {beta}")
         return game.get_declarer_tricks()
 
+    key = None
+    if (tt is not None or use_bounds) and game.is_trick_start():
+        # the table and the bounds count the tricks won from this position onwards
+        won = game.get_declarer_tricks()
+        if tt is not None:
+            key = game.get_position_key()
+            bounds = tt.lookup(key)
+            if bounds is not None:
+                lower, upper = bounds[0] + won, bounds[1] + won
+                if lower >= beta or lower == upper:
+                    return lower
+                if upper <= alpha:
+                    return upper
+                alpha = max(alpha, lower)
+                beta = min(beta, upper)
+        if use_bounds:
+            lower, upper = trick_bounds(game)
+            lower, upper = lower + won, upper + won
+            if lower >= beta or lower == upper:
+                return lower
+            if upper <= alpha:
+                return upper
+            alpha = max(alpha, lower)
+            beta = min(beta, upper)
+        alpha_orig, beta_orig = alpha, beta
+
     # turn of a Max team
     if game.is_max():
         max_eval = -20
         actions = game.available_actions()
-        # TODO: prune actions here
+        if ordering is not None:
+            actions = ordering.order(game, actions)
         for action in actions:
             game.push_action(action)
-            curr_eval = ab_search(game, alpha, beta)
+            curr_eval = ab_search(game, alpha, beta, tt, ordering, use_bounds)
             game.pop_action()
             max_eval = max(max_eval, curr_eval)
             alpha = max(alpha, curr_eval)
             # pruning
             if beta <= alpha:
+                if ordering is not None:
+                    ordering.cutoff(game, action)
                 break
-        return max_eval
+        value = max_eval
     # turn of Min team
     else:
         min_eval = 20
         actions = game.available_actions()
-        # TODO: prune actions here
+        if ordering is not None:
+            actions = ordering.order(game, actions)
         for action in actions:
             game.push_action(action)
-            curr_eval = ab_search(game, alpha, beta)
+            curr_eval = ab_search(game, alpha, beta, tt, ordering, use_bounds)
             game.pop_action()
             min_eval = min(min_eval, curr_eval)
             beta = min(beta, curr_eval)
             # pruning
             if beta <= alpha:
+                if ordering is not None:
+                    ordering.cutoff(game, action)
                 break
-        return min_eval
+        value = min_eval
+
+    if key is not None:
+        if value <= alpha_orig:
+            tt.store(key, 0, value - won)
+        elif value >= beta_orig:
+            tt.store(key, value - won, game.get_remaining_tricks())
+        else:
+            tt.store(key, value - won, value - won)
+
+    return value
@@ -1,103 +1,81 @@
 """
-In this file we define the alpha-beta pruning exploration algorithm. The goal is to find the number of tricks that
-the starting team can make given the initial game state.
+In this file we define the parallel version of the alpha-beta pruning exploration algorithm. The goal is to find the
+number of tricks that the starting team can make given the initial game state.
+
+The root is split among the processes of a pool (Young Brothers Wait at the root): the first root move is searched by
+the calling process, then the other root moves are searched in parallel. The only bound shared by sibling subtrees is
+the one of the root (alpha if the root is a Max node, beta otherwise): it lives in shared memory, every worker raises
+(or lowers) it when its subtree is done and reads it before starting a new subtree. Since the root value is the best of
+the children values and every subtree is searched with a window that contains it, the result is the same value
+returned by the sequential ab_search.
 """
 
-from double_dummy.game.game_state_old import GameState
-import threading
-import copy
+from double_dummy.tree_exploration import ab_search
+from double_dummy.transposition_table import TranspositionTable
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
 
-alpha = -20
-beta = 20
-lock = threading.Lock()
 
+# root bound shared with the workers, set by _init_worker
+_root_bound = None
 
-def _ab_search(game: GameState) -> int:
+
+def _init_worker(root_bound):
+    global _root_bound
+    _root_bound = root_bound
+
+
+def _update_root_bound(root_bound, value, is_max):
+    with root_bound.get_lock():
+        if is_max:
+            root_bound.value = max(root_bound.value, value)
+        else:
+            root_bound.value = min(root_bound.value, value)
+
+
+def _search_root_move(game, action, is_max, use_tt) -> int:
     """
-    Alpha-Beta multithread search.
-    The reward is limited to the interval [0,13], because Bridge has always 13 hands to play. We can therefore set alpha
-    and beta to +-20 (or any interval that strictly contains 0,13).
+    Search the subtree of a root move with the root bound known now, then share the result
     """
+    game.push_action(action)
+    if is_max:
+        alpha, beta = _root_bound.value, 20
+    else:
+        alpha, beta = -20, _root_bound.value
+    result = ab_search(game, alpha, beta, TranspositionTable() if use_tt else None)
 
-    global alpha, beta
+    # a result on the wrong side of the bound is a bound of a worse value, the update ignores it
+    _update_root_bound(_root_bound, result, is_max)
+    return result
 
-    # if the game is over (leaf node), return the number of tricks won by Max
-    if game.is_game_over():
-        # debug print
-        print(f"Leaf node reached: actions = {game.str_actions()}\n\tvalue = {game.get_declarer_tricks()}, alpha = {alpha}, beta = {beta}")
-        return game.get_declarer_tricks()
 
-    # turn of a Max team
-    if game.is_max():
-        max_eval = -20
-        actions = game.available_actions()
-        # TODO: prune actions here
-        for action in actions:
-            game.push_action(action)
-            curr_eval = _ab_search(game)
-            game.pop_action()
-            max_eval = max(max_eval, curr_eval)
-            lock.acquire()
-            alpha = max(alpha, curr_eval)
-            # pruning
-            if beta <= alpha:
-                lock.release()
-                print("pruning")
-                break
-            lock.release()
-        return max_eval
-    # turn of Min team
-    else:
-        min_eval = 20
-        actions = game.available_actions()
-        # TODO: prune actions here
-        for action in actions:
-            game.push_action(action)
-            curr_eval = _ab_search(game)
-            game.pop_action()
-            min_eval = min(min_eval, curr_eval)
-            lock.acquire()
-            beta = min(beta, curr_eval)
-            # pruning
-            if beta <= alpha:
-                lock.release()
-                break
-            lock.release()
-        return min_eval
-
-
-class ABSearchThread(threading.Thread):
-    def __init__(self, game):
-        threading.Thread.__init__(self)
-        self.result = 0
-        self.game = game
-
-    def run(self):
-        self.result = _ab_search(self.game)
-
-    def join(self, *args) -> int:
-        threading.Thread.join(self, *args)
-        return self.result
-
-
-def multi_thread_ab_search(game: GameState) -> int:
+def parallel_ab_search(game, processes=None, use_tt=True) -> int:
     """
-    Call the alpha beta pruning search creating one thread per child of the first node
+    Alpha-Beta search with the root moves split among a pool of processes.
+    :param game: game state, it must be picklable (GameState and BitboardGameState are)
+    :param processes: number of worker processes, the number of cpus if None
+    :param use_tt: use a transposition table in each subtree search
+    :return: same value as ab_search(game)
     """
-    results = []
-    threads = []
+    if game.is_game_over():
+        return game.get_declarer_tricks()
 
-    # the first player is the declarer, therefore a Max player
+    is_max = game.is_max()
     actions = game.available_actions()
-    for i in range(len(actions)):
-        game_copy = copy.deepcopy(game)
-        game_copy.push_action(actions[i])
-        results.append(0)
-        threads.append(ABSearchThread(game_copy))
-        threads[i].start()
-        game.pop_action()
-
-    for i in range(len(actions)):
-        results[i] = threads[i].join()
-
-    return max(results)
+
+    # eldest brother first, in this process: it gives the bound the other moves are searched with
+    game.push_action(actions[0])
+    first = ab_search(game, tt=TranspositionTable() if use_tt else None)
+    game.pop_action()
+    if len(actions) == 1:
+        return first
+
+    root_bound = multiprocessing.Value('i', first)
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(root_bound,)) as executor:
+        futures = [executor.submit(_search_root_move, game, action, is_max, use_tt) for action in actions[1:]]
+        results = [future.result() for future in futures]
+
+    if is_max:
+        return max([first] + results)
+    else:
+        return min([first] + results)
@@ -20,58 +20,78 @@ Explore the game tree to fill the infosets and payoff data
 
 def explore_tree(game_state: GameState, last_sequence: Dict[PlayerId, Sequence],
                  infosets: Dict[PlayerId, Dict[str, InfosetInfo]], payoff_mat: PayoffMatrix):
-    if not game_state.is_game_over():
-        # gathering all information
-        # getting declarer id instead of dummy one
-        player = game_state.fix_id(game_state.get_current_player_id())
-        parent_sequence = last_sequence[player]
-
-        infoset_name = game_state.gen_infoset_name()
-        available_actions = game_state.available_actions()
-
-        # retrieving the correct infoset if it exists or generating a new one otherwise
-        # the id will be overwritten anyway, the assignment is just to create the variable
-        infoset_id = 0
-        player_infosets = infosets[player]
-
-        # use the name attribute to identify the infosets and see if they've been already analysed
-        if infoset_name in player_infosets.keys():
-            # update the id with the already existing id
-            entry = player_infosets[infoset_name]
-            infoset_id = entry.info_id
+    # depth first search with an explicit stack of frames [player, his last sequence before the node, infoset id,
+    # actions, index of the next action]; the last sequences are kept in one list, restored when a node is left
+    sequences = list(last_sequence.values())
+    stack = []
+
+    while True:
+        if not game_state.is_game_over():
+            # gathering all information
+            # getting declarer id instead of dummy one
+            player = game_state.fix_id(game_state.get_current_player_id())
+            parent_sequence = sequences[player]
+
+            infoset_name = game_state.gen_infoset_name()
+            available_actions = game_state.available_actions()
+
+            # retrieving the correct infoset if it exists or generating a new one otherwise
+            # the id will be overwritten anyway, the assignment is just to create the variable
+            infoset_id = 0
+            player_infosets = infosets[player]
+
+            # use the name attribute to identify the infosets and see if they've been already analysed
+            if infoset_name in player_infosets.keys():
+                # update the id with the already existing id
+                entry = player_infosets[infoset_name]
+                infoset_id = entry.info_id
+            else:
+                # generate the id to continue the succession
+                infoset_id = len(player_infosets)
+                infoset_info = InfosetInfo(infoset_id, infoset_name, parent_sequence, available_actions.copy())
+                player_infosets[infoset_name] = infoset_info
+
+            stack.append([player, parent_sequence, infoset_id, available_actions, 0])
+
+        else:
+            # game is over
+            # determine the winner(s) of the game and push the utilities in the payoff matrix
+            # assert that the total number of tricks won is equal to the number of turns played
+            tricks_won = game_state.get_curr_turn_info().tricks_won
+            assert sum(tricks_won.values()) == game_state.ranks * 4 / game_state.n_players, "turn_info.tricks_won ill-posed"
+
+            team1_tricks = team2_tricks = 0
+            for (tid, team) in game_state.teams.items():
+                for pid in team.members:
+                    tricks = tricks_won[pid]
+                    if tid == 0:
+                        team1_tricks += tricks
+                    else:
+                        team2_tricks += tricks
+
+            # current payoff = number of tricks won
+            key = tuple(sequences)
+            assert key not in payoff_mat.keys(), "duplicate payoff matrix key! using last sequences not feasible"
+            payoff_mat[key] = ({0: team1_tricks, 1: team2_tricks}, CHANCE_VALUE)
+
+        # go to the next action of the deepest node that has one left
+        while len(stack) != 0:
+            frame = stack[-1]
+            player, parent_sequence, infoset_id, actions, next_action = frame
+            if next_action > 0:
+                game_state.pop_action()
+            if next_action < len(actions):
+                frame[4] = next_action + 1
+                sequences[player] = Sequence(infoset_id, actions[next_action])
+                game_state.push_action(actions[next_action])
+                break
+            if len(stack) == 1:
+                # as in the recursive version, last_sequence keeps the sequence of the last action of the root
+                last_sequence[player] = sequences[player]
+            sequences[player] = parent_sequence
+            stack.pop()
         else:
-            # generate the id to continue the succession
-            infoset_id = len(player_infosets)
-            infoset_info = InfosetInfo(infoset_id, infoset_name, parent_sequence, available_actions.copy())
-            player_infosets[infoset_name] = infoset_info
-
-        for action in available_actions:
-            last_sequence[player] = Sequence(infoset_id, action)
-
-            game_state.push_action(action)
-            explore_tree(game_state, last_sequence.copy(), infosets, payoff_mat)
-            game_state.pop_action()
-
-    else:
-        # game is over
-        # determine the winner(s) of the game and push the utilities in the payoff matrix
-        # assert that the total number of tricks won is equal to the number of turns played
-        tricks_won = game_state.get_curr_turn_info().tricks_won
-        assert sum(tricks_won.values()) == game_state.ranks * 4 / game_state.n_players, "turn_info.tricks_won ill-posed"
-
-        team1_tricks = team2_tricks = 0
-        for (tid, team) in game_state.teams.items():
-            for pid in team.members:
-                tricks = tricks_won[pid]
-                if tid == 0:
-                    team1_tricks += tricks
-                else:
-                    team2_tricks += tricks
-
-        # current payoff = number of tricks won
-        key = tuple(last_sequence.values())
-        assert key not in payoff_mat.keys(), "duplicate payoff matrix key! using last sequences not feasible"
-        payoff_mat[key] = ({0: team1_tricks, 1: team2_tricks}, CHANCE_VALUE)
+            return
 
 
 """
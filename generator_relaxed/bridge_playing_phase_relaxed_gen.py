@@ -3,8 +3,9 @@ import time
 from generator_relaxed.game.game_state import *
 from misc.hand_gen import generate_hands
 from generator_relaxed.tree.exploration_functions import *
-from generator_relaxed.logger import Logger
+from generator_relaxed.logger import Logger, NullLogger
 import generator_relaxed.game.reward as reward
+from concurrent.futures import ProcessPoolExecutor
 import sys
 import os
 
@@ -19,58 +20,148 @@ reward_calculator = reward.RewardNumberOfTricks()
 
 
 def explore_tree(game_state: GameState, last_sequence: Dict[PlayerId, Sequence],
-                 infosets: Dict[PlayerId, Dict[str, InfosetInfo]], payoff_mat: PayoffMatrix):
+                 infosets: Dict[PlayerId, Dict[tuple, InfosetInfo]], payoff_mat: PayoffMatrix, infoset_names=True):
     """
-    Explore the game tree to fill the infosets and payoff data
+    Explore the game tree to fill the infosets and payoff data.
+    The names of the infosets are only used by the verbose log: with infoset_names False they are None.
+    The exploration is a depth first search with an explicit stack, so it is not limited by the recursion depth: each
+    frame is the undo record of a node being explored, [player, his last sequence before the node, infoset id,
+    actions, index of the next action]. The last sequence of each player is kept in one list, updated when an action
+    is played and restored when the node is left
     """
-    if not game_state.is_game_over():
-        # gathering all information
-        # getting declarer id instead of dummy one
-        player = game_state.fix_id(game_state.get_current_player_id())
-        parent_sequence = last_sequence[player]
-
-        infoset_name = game_state.gen_infoset_name()
-        available_actions = game_state.available_actions()
-
-        # retrieving the correct infoset if it exists or generating a new one otherwise
-        # the id will be overwritten anyway, the assignment is just to create the variable
-        infoset_id = 0
-        player_infosets = infosets[player]
-
-        # use the name attribute to identify the infosets and see if they've been already analysed
-        if infoset_name in player_infosets.keys():
-            # update the id with the already existing id
-            entry = player_infosets[infoset_name]
-            infoset_id = entry.info_id
+    # last sequence of each player, in the order of last_sequence (the order of the payoff matrix keys)
+    sequences = list(last_sequence.values())
+    stack = []
+
+    while True:
+        if not game_state.is_game_over():
+            # gathering all information
+            # getting declarer id instead of dummy one
+            player = game_state.fix_id(game_state.get_current_player_id())
+
+            infoset_key = game_state.infoset_key()
+            available_actions = game_state.available_actions()
+
+            player_infosets = infosets[player]
+
+            # use the infoset key (same identity as the name) to see if they've been already analysed
+            entry = player_infosets.get(infoset_key)
+            if entry is not None:
+                # update the id with the already existing id
+                infoset_id = entry.info_id
+            else:
+                # generate the id to continue the succession, the name is only built once per infoset
+                infoset_id = len(player_infosets)
+                name = game_state.gen_infoset_name() if infoset_names else None
+                infoset_info = InfosetInfo(infoset_id, name, sequences[player], available_actions.copy())
+                player_infosets[infoset_key] = infoset_info
+
+            stack.append([player, sequences[player], infoset_id, available_actions, 0])
+
+        else:
+            # game is over
+            # determine the winner(s) of the game and push the utilities in the payoff matrix
+            rewards = reward_calculator.compute(game_state)
+
+            # current payoff = number of tricks won
+            payoff_mat[tuple(sequences)] = (rewards, CHANCE_VALUE)
+
+        # go to the next node: the next action of the deepest node that has one left
+        while len(stack) != 0:
+            frame = stack[-1]
+            player, parent_sequence, infoset_id, actions, next_action = frame
+            if next_action > 0:
+                # undo the action explored last
+                game_state.pop_action()
+            if next_action < len(actions):
+                frame[4] = next_action + 1
+                sequences[player] = Sequence(infoset_id, actions[next_action])
+                game_state.push_action(actions[next_action])
+                break
+            # every action explored, leave the node
+            if len(stack) == 1:
+                # the root node updates last_sequence with the sequence of its last action, as the recursive version
+                # did: the next game explored with the same last_sequence (see main_playing_phase) starts from it
+                last_sequence[player] = sequences[player]
+            sequences[player] = parent_sequence
+            stack.pop()
         else:
-            # generate the id to continue the succession
-            infoset_id = len(player_infosets)
-            infoset_info = InfosetInfo(infoset_id, infoset_name, parent_sequence, available_actions.copy())
-            player_infosets[infoset_name] = infoset_info
+            return
 
-        for action in available_actions:
-            last_sequence[player] = Sequence(infoset_id, action)
 
-            game_state.push_action(action)
-            explore_tree(game_state, last_sequence.copy(), infosets, payoff_mat)
-            game_state.pop_action()
+def _explore_game(game_state: GameState, n_players: int, chance_value: float, infoset_names: bool):
+    """
+    Explore a single game from scratch, in a worker process: infoset ids, sequences and sequence ids are local to the
+    game, _merge_game translates them.
+    Return the player of the root, the infosets, the payoff matrix, the history table of the game and the last
+    sequence left by the root
+    """
+    global CHANCE_VALUE
+    CHANCE_VALUE = chance_value
 
-    else:
-        # game is over
-        # determine the winner(s) of the game and push the utilities in the payoff matrix
-        rewards = reward_calculator.compute(game_state)
+    infosets = {p: {} for p in range(n_players)}
+    last_sequence = {p: Sequence() for p in range(n_players)}
+    payoff_mat = {}
+    explore_tree(game_state, last_sequence, infosets, payoff_mat, infoset_names)
 
-        # current payoff = number of tricks won
-        key = tuple(last_sequence.values())
-        payoff_mat[key] = (rewards, CHANCE_VALUE)
+    root_player = game_state.fix_id(game_state.get_current_player_id())
+    return root_player, infosets, payoff_mat, game_state.history_table(), last_sequence[root_player]
 
 
-def main_playing_phase(n_players: int, ranks: int, bid: Bid, declarer: int, hands: List[Dict[PlayerId, List[Card]]]):
+def _merge_game(result, history_ids: Dict[Tuple[int, int, int], int], last_sequence: Dict[PlayerId, Sequence],
+                infosets: Dict[PlayerId, Dict[tuple, InfosetInfo]], payoff_mat: PayoffMatrix):
+    """
+    Add the result of _explore_game to the data of the games explored before it, as if explore_tree had explored the
+    game after them: the local infosets are visited in order of local id (the order in which explore_tree finds them),
+    the ones not seen before get the next global id, and the empty sequence stands for the initial last_sequence
+    """
+    root_player, local_infosets, local_payoffs, local_history, local_last = result
+
+    # local sequence of actions id -> global id
+    history_map = {0: 0}
+    for local_id, (parent, player, card_index) in enumerate(local_history, 1):
+        history_key = (history_map[parent], player, card_index)
+        history_map[local_id] = history_ids.setdefault(history_key, len(history_ids) + 1)
+
+    # player -> local infoset id -> global infoset id
+    id_maps = {}
+
+    def global_sequence(player, sequence):
+        if sequence.seq_id is None:
+            return last_sequence[player]
+        return Sequence(id_maps[player][sequence.seq_id], sequence.action)
+
+    for player, player_infosets in local_infosets.items():
+        id_map = id_maps[player] = {}
+        for key, info in player_infosets.items():
+            global_key = key[:-1] + (history_map[key[-1]],)
+            entry = infosets[player].get(global_key)
+            if entry is None:
+                entry = InfosetInfo(len(infosets[player]), info.name, global_sequence(player, info.parent_sequence),
+                                    info.actions)
+                infosets[player][global_key] = entry
+            id_map[info.info_id] = entry.info_id
+
+    for sequences, value in local_payoffs.items():
+        payoff_mat[tuple(global_sequence(p, seq) for p, seq in enumerate(sequences))] = value
+
+    # as explore_tree does, the root leaves the sequence of its last action in last_sequence
+    last_sequence[root_player] = global_sequence(root_player, local_last)
+
+
+def main_playing_phase(n_players: int, ranks: int, bid: Bid, declarer: int, hands: List[Dict[PlayerId, List[Card]]],
+                       processes=1, verbose=True, write_output=True):
     """
     Main function of the playing phase. Tests a finite number of combinations of hands, keeping the bid constant.
+    With processes > 1 the games are explored in parallel, one per worker, and merged in order: the output is the
+    same as the sequential exploration.
+    With verbose False the verbose log is not written and the infoset names are not generated.
+    The output file is written section by section once the games are explored, without building it in memory; with
+    write_output False it is not written at all.
+    Return the treeplexes, the sequence numbering of each player with a treeplex and the payoff matrix: the content of
+    the output file, see cfr.input_parsers.generator_game to build the game solved by cfr from them
     """
-    verbose_log = Logger(LogID)
-    output = Logger(OutID)
+    verbose_log = Logger(LogID) if verbose else NullLogger()
 
     hands_str_list = [gen_card_distribution_str(hand_distr) for hand_distr in hands]
 
@@ -79,16 +170,6 @@ def main_playing_phase(n_players: int, ranks: int, bid: Bid, declarer: int, hand
     games = []
     games_number = len(hands)
 
-    # buffers used to store information to be printed in output file
-    output_buffer_info = f"### info\nBridge playing phase - relaxed version: the defenders can see each other's hand and are therefore treated as the same player\n{n_players}\n{ranks}\n"
-    output_buffer_game = "### game specific info\n"
-    output_buffer_tree = "### treeplexes\n"
-    output_buffer_util = "### utility matrix\n"
-
-    output_buffer_game += "# winning bid - declarer - n.games\n"
-    output_buffer_game += f"{bid}, {PID_TO_CARDINAL[declarer]}, {games_number}\n"
-    output_buffer_game += '\n'.join(hands_str_list)
-
     global CHANCE_VALUE
     CHANCE_VALUE = 1 / games_number
 
@@ -101,9 +182,11 @@ def main_playing_phase(n_players: int, ranks: int, bid: Bid, declarer: int, hand
             defenders = team.members
     second_defender = defenders[1] if len(defenders) == 2 else -1
 
+    # shared by the games, so that the same sequence of actions has the same id in every game
+    history_ids = {}
     for j in range(games_number):
         verbose_log.log_line("Game {}".format(j))
-        games.append(GameState(n_players, teams, hands[j], ranks, bid, declarer))
+        games.append(GameState(n_players, teams, hands[j], ranks, bid, declarer, history_ids))
 
         for i in range(n_players):
             verbose_log.log_line("\t{}".format(gen_hand_description(i, hands[j][i])))
@@ -129,7 +212,7 @@ def main_playing_phase(n_players: int, ranks: int, bid: Bid, declarer: int, hand
         logstr += f", dummy: {PID_TO_CARDINAL[dummy_id]}"
     verbose_log.log_line(logstr)
 
-    infosets: Dict[PlayerId, Dict[str, InfosetInfo]] = {}
+    infosets: Dict[PlayerId, Dict[tuple, InfosetInfo]] = {}
     last_sequence: Dict[PlayerId, Sequence] = {}
     payoff_mat: PayoffMatrix = {}
 
@@ -140,10 +223,17 @@ def main_playing_phase(n_players: int, ranks: int, bid: Bid, declarer: int, hand
         last_sequence[p] = Sequence()
 
     # generating the infosets
-    for game in games:
-        for s in last_sequence.values():
-            s = Sequence()
-        explore_tree(game, last_sequence, infosets, payoff_mat)
+    if processes > 1:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            results = executor.map(_explore_game, games, [n_players] * games_number, [CHANCE_VALUE] * games_number,
+                                   [verbose] * games_number)
+            for result in results:
+                _merge_game(result, history_ids, last_sequence, infosets, payoff_mat)
+    else:
+        for game in games:
+            for s in last_sequence.values():
+                s = Sequence()
+            explore_tree(game, last_sequence, infosets, payoff_mat, verbose)
 
     # 1. build the map sequence -> infoset where the sequence is the parent of the corresponding infosets
     # 2. sort the infosets according to a DFS order
@@ -154,10 +244,11 @@ def main_playing_phase(n_players: int, ranks: int, bid: Bid, declarer: int, hand
             sorted_infosets[player_id] = dfs_sort_infosets(map)
 
     # debug print
-    for (pid, si) in sorted_infosets.items():
-        verbose_log.log_line(f"\n{PID_TO_CARDINAL[pid]} sorted infosets:")
-        for infoset in si:
-            verbose_log.log_line("\t" + str(infoset))
+    if verbose:
+        for (pid, si) in sorted_infosets.items():
+            verbose_log.log_line(f"\n{PID_TO_CARDINAL[pid]} sorted infosets:")
+            for infoset in si:
+                verbose_log.log_line("\t" + str(infoset))
 
     # assign a number to each sequence
     sequence_numbering: Dict[PlayerId, Dict[Sequence, int]] = {}
@@ -165,8 +256,9 @@ def main_playing_phase(n_players: int, ranks: int, bid: Bid, declarer: int, hand
         if player_id != dummy_id and player_id != second_defender:
             verbose_log.log_line(f"\n{PID_TO_CARDINAL[player_id]} sequences:")
             sequence_numbering[player_id] = assign_sequence_numbers(sorted_infosets[player_id])
-            for (seq, num) in sequence_numbering[player_id].items():
-                verbose_log.log_line("\tSeq " + str(num) + ": " + str(seq))
+            if verbose:
+                for (seq, num) in sequence_numbering[player_id].items():
+                    verbose_log.log_line("\tSeq " + str(num) + ": " + str(seq))
     verbose_log.log_line("")
 
     # creating a map of treeplexes
@@ -176,17 +268,41 @@ def main_playing_phase(n_players: int, ranks: int, bid: Bid, declarer: int, hand
             treeplexes[player_id] = create_treeplex(player_id, sorted_infosets[player_id],
                                                     sequence_numbering[player_id])
             # debug print
-            verbose_log.log_line(treeplexes[player_id])
-            output_buffer_tree += treeplexes[player_id].short_str()
+            verbose_log.log_lines(treeplexes[player_id].lines())
+            verbose_log.log_line("")
 
-    output_buffer_info += f"{ ' '.join(str(tree.num_sequences) for tree in treeplexes.values()) }\n"
-    infosets_count = []
-    for _, info_list in sorted_infosets.items():
-        infosets_count.append(len(info_list))
-    output_buffer_info += f"{ ' '.join(str(c) for c in infosets_count) }\n"
-    output_buffer_info += f"{reward_calculator.type}\n"
+    if write_output:
+        _write_output(n_players, ranks, bid, declarer, hands_str_list, sorted_infosets, treeplexes, sequence_numbering,
+                      payoff_mat)
+
+    # debug print
+    if verbose:
+        for (sequences, (pay_dict, chance)) in payoff_mat.items():
+            verbose_log.log_str(f"Chance: {chance}, Seq: ")
+            for i in range(n_players):
+                if i in sequence_numbering:
+                    verbose_log.log_str(str(sequence_numbering[i][sequences[i]]) + "  ")
+                else:
+                    verbose_log.log_str("empty  ")
+            verbose_log.log_str("\n")
+            for (team, util) in pay_dict.items():
+                verbose_log.log_line("\tTeam " + str(team + 1) + " util: " + str(util))
 
-    # handling payoffs
+    print("Process ended")
+    if write_output:
+        print("The output file has been saved as: " + OutID)
+    verbose_log.close_logger()
+
+    return treeplexes, sequence_numbering, payoff_mat
+
+
+def _write_output(n_players: int, ranks: int, bid: Bid, declarer: int, hands_str_list: List[str],
+                  sorted_infosets: Dict[PlayerId, List[InfosetInfo]], treeplexes: Dict[PlayerId, Treeplex],
+                  sequence_numbering: Dict[PlayerId, Dict[Sequence, int]], payoff_mat: PayoffMatrix):
+    """
+    Write the output file, one section at a time
+    """
+    # bounds of the payoffs, written in the info section before the utility matrix
     min_payoffs = {
         0: 10000,
         1: 10000
@@ -195,37 +311,40 @@ def main_playing_phase(n_players: int, ranks: int, bid: Bid, declarer: int, hand
         0: 0,
         1: 0
     }
-    for (sequences, (pay_dict, chance)) in payoff_mat.items():
-        verbose_log.log_str(f"Chance: {chance}, Seq: ")
-        for i in range(n_players):
-            if i != dummy_id and i != second_defender:
-                numbering = sequence_numbering[i]
-                seq = sequences[i]
-                verbose_log.log_str(str(numbering[seq]) + "  ")
-                output_buffer_util += f"{numbering[seq]} "
-            else:
-                verbose_log.log_str("empty  ")
-                output_buffer_util += "e "
-        verbose_log.log_str("\n")
+    for (pay_dict, _) in payoff_mat.values():
         for (team, util) in pay_dict.items():
             if util < min_payoffs[team]:
                 min_payoffs[team] = util
             if util > max_payoffs[team]:
                 max_payoffs[team] = util
-            verbose_log.log_line("\tTeam " + str(team + 1) + " util: " + str(util))
-            output_buffer_util += f"{util} "
-        output_buffer_util += f"{chance}\n"
 
-    output_buffer_info += f"{ ' '.join( f'{min_payoffs[team]} {max_payoffs[team]}' for team in [0,1]) }\n"
+    output = Logger(OutID)
+    output.log_str(f"### info\nBridge playing phase - relaxed version: the defenders can see each other's hand and are therefore treated as the same player\n{n_players}\n{ranks}\n")
+    output.log_line(' '.join(str(tree.num_sequences) for tree in treeplexes.values()))
+    output.log_line(' '.join(str(len(info_list)) for info_list in sorted_infosets.values()))
+    output.log_line(reward_calculator.type)
+    output.log_line(' '.join(f'{min_payoffs[team]} {max_payoffs[team]}' for team in [0, 1]))
+
+    output.log_line("### game specific info")
+    output.log_line("# winning bid - declarer - n.games")
+    output.log_line(f"{bid}, {PID_TO_CARDINAL[declarer]}, {len(hands_str_list)}")
+    output.log_line('\n'.join(hands_str_list))
+
+    output.log_line("### treeplexes")
+    for tree in treeplexes.values():
+        output.log_lines(tree.short_lines())
+
+    # one row of the utility matrix at a time
+    output.log_line("### utility matrix")
+    # numbering of the sequences of each player, None for the players without a treeplex
+    numberings = [sequence_numbering.get(i) for i in range(n_players)]
+    for (sequences, (pay_dict, chance)) in payoff_mat.items():
+        row = ' '.join("e" if numbering is None else str(numbering[seq])
+                       for numbering, seq in zip(numberings, sequences))
+        output.log_line(f"{row} {' '.join(str(util) for util in pay_dict.values())} {chance}")
 
-    output.log_str(output_buffer_info)
-    output.log_line(output_buffer_game)
-    output.log_str(output_buffer_tree)
-    output.log_line(output_buffer_util)
+    output.log_line("")
     output.close_logger()
-    print("Process ended")
-    print("The output file has been saved as: " + LogID)
-    verbose_log.close_logger()
 
 
 # ======================================================================================================================
@@ -233,9 +352,9 @@ def main_playing_phase(n_players: int, ranks: int, bid: Bid, declarer: int, hand
 
 if __name__ == "__main__":
     args = sys.argv
-    if len(sys.argv) == 7:
+    if len(sys.argv) in (7, 8):
         # called from command line
-        # syntax: n_players ranks game_number bid trump declarer
+        # syntax: n_players ranks game_number bid trump declarer [processes]
         args.pop(0)
 
         n_players = int(args[0])
@@ -246,11 +365,13 @@ if __name__ == "__main__":
         assert args[5] in CARDINAL_TO_PID.keys(), "ERROR: invalid declarer, use N, E, S or W"
         declarer = CARDINAL_TO_PID[args[5]]
 
+        processes = int(args[6]) if len(args) == 7 else 1
+
         hands = generate_hands(n_players, ranks, n_games)
-        main_playing_phase(n_players, ranks, Bid(bid_val, import_suit_from_char(trump)), declarer, hands)
+        main_playing_phase(n_players, ranks, Bid(bid_val, import_suit_from_char(trump)), declarer, hands, processes)
     else:
         print("Please insert the following parameters:\n"
-              "n_players n_ranks n_games_to_simulate bid_value trump(c,d,h,s,n) declarer(N,E,S,W)")
+              "n_players n_ranks n_games_to_simulate bid_value trump(c,d,h,s,n) declarer(N,E,S,W) [processes]")
 
         # default generation
         # n_players = 4
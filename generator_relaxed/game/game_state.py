@@ -1,4 +1,4 @@
-from typing import Dict
+from typing import Dict, Tuple
 from misc.game_structures import *
 
 
@@ -28,6 +28,12 @@ class Hand:
 
         self.ranks = len(cards)
 
+        # bitmask of the cards still in hand (bit card.index): the hand string only depends on these cards, since
+        # clusters always list them from the highest to the lowest
+        self.mask = 0
+        for card in cards:
+            self.mask |= 1 << card.index
+
         # Dict of [suit, List[List[Card]], gives clusters for each suit in player's hand
         self._suits = {}
 
@@ -88,11 +94,13 @@ class Hand:
 
     def remove_played(self, card):
         self._remaining -= 1
+        self.mask &= ~(1 << card.index)
         cluster = self.card_to_cluster_dict[card]
         cluster.remove(card)
 
     def undo(self, card):
         self._remaining += 1
+        self.mask |= 1 << card.index
         cluster = self.card_to_cluster_dict[card]
         cluster.append(card)
         cluster.sort(reverse=True)
@@ -130,7 +138,8 @@ class GameState:
     Players and relative hands are passed as parameter because they were necessary
     already for the bidding part.
     """
-    def __init__(self, n_players, teams: Dict[int, Team], hands: Dict[PlayerId, List[Card]], ranks: int, bid: Bid, bid_winner_id=0):
+    def __init__(self, n_players, teams: Dict[int, Team], hands: Dict[PlayerId, List[Card]], ranks: int, bid: Bid, bid_winner_id=0,
+                 history_ids: Dict[Tuple[int, int, int], int] = None):
         self.ranks = ranks
         # players is a map with player id as key
         self.teams = teams
@@ -155,6 +164,13 @@ class GameState:
         # actions is a vector of (player_id, action_performed)
         self.actions = []
 
+        # every sequence of actions gets an id, the first time it is played: (id of the sequence without its last
+        # action, player, card index) -> id, 0 is the empty sequence. Games that share the dict (the deals of the same
+        # generation) give the same id to the same sequence
+        self._history_ids = {} if history_ids is None else history_ids
+        # id of the sequence of actions after each action
+        self._history = [0]
+
         self.declarer_id = bid_winner_id
         self.dummy_id = -1
         self.dummy_exists = False
@@ -168,6 +184,10 @@ class GameState:
             else:
                 self.defender_team = team
 
+        defenders = self.defender_team.members
+        self._first_defender = defenders[0]
+        self._second_defender = defenders[1] if len(defenders) == 2 else -1
+
     def get_curr_turn_info(self) -> TurnInfo:
         return self.turn_info[len(self.turn_info) - 1]
 
@@ -190,6 +210,12 @@ class GameState:
         turn = self.get_curr_turn_info()
         self.actions.append( (turn.current_player_id, card_played) )
 
+        history_key = (self._history[-1], turn.current_player_id, card_played.index)
+        history_id = self._history_ids.get(history_key)
+        if history_id is None:
+            history_id = self._history_ids[history_key] = len(self._history_ids) + 1
+        self._history.append(history_id)
+
         self.hands[turn.current_player_id].remove_played(card_played)
 
         next_player = (turn.current_player_id+1)%self.n_players
@@ -211,6 +237,7 @@ class GameState:
         if len(self.actions) == 0:
             return 0
         (popped_player_id, popped_card) = self.actions.pop()
+        self._history.pop()
         self.turn_info.pop()
         hand = self.hands[popped_player_id]
         hand.undo(popped_card)
@@ -299,6 +326,31 @@ class GameState:
 
         return s
 
+    def history_table(self) -> List[Tuple[int, int, int]]:
+        """
+        (id of the parent sequence, player, card index) of every sequence of actions with an id, in order of id
+        """
+        return sorted(self._history_ids, key=self._history_ids.get)
+
+    def infoset_key(self) -> Tuple[int, ...]:
+        """
+        Key that identifies the infoset as gen_infoset_name does, without building the string: the player, the cards
+        left in the hands he can see (bitmasks, -1 for hands not in the name) and the id of the sequence of actions.
+        Two nodes have the same key if and only if they have the same name
+        """
+        pid = self.get_current_player_id()
+        if pid == self.dummy_id:
+            pid = self.declarer_id
+        if pid == self._second_defender:
+            pid = self._first_defender
+
+        second_defender_mask = -1
+        if self._second_defender != -1 and pid == self._first_defender:
+            second_defender_mask = self.hands[self._second_defender].mask
+        dummy_mask = self.hands[self.dummy_id].mask if self.dummy_exists else -1
+
+        return pid, self.hands[pid].mask, second_defender_mask, dummy_mask, self._history[-1]
+
     def fix_id(self, pid: int) -> int:
         """
         Change the dummy id into the declearer one, if necessary.
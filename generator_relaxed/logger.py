@@ -11,5 +11,30 @@ class Logger:
     def log_str(self, obj):
         self.file.write(str(obj))
 
+    def log_lines(self, lines):
+        """
+        Write each string of lines on its own line, as they are generated
+        """
+        for line in lines:
+            self.file.write(line)
+            self.file.write("\n")
+
     def close_logger(self):
         self.file.close()
+
+
+class NullLogger:
+    """
+    Logger that discards everything, used when the verbose log is disabled
+    """
+    def log_line(self, obj):
+        pass
+
+    def log_str(self, obj):
+        pass
+
+    def log_lines(self, lines):
+        pass
+
+    def close_logger(self):
+        pass
@@ -25,17 +25,27 @@ class Treeplex:
     def empty_sequence_id(self) -> int:
         return self.num_sequences - 1
 
-    def __str__(self):
-        s = f"Treeplex of {PID_TO_CARDINAL[self.player]}, number of sequences = {self.num_sequences}\n"
+    def lines(self):
+        """
+        Lines of __str__, generated one at a time
+        """
+        yield f"Treeplex of {PID_TO_CARDINAL[self.player]}, number of sequences = {self.num_sequences}"
         for infoset in self.infosets:
-            s += "\t" + str(infoset) + "\n"
-        return s
+            yield "\t" + str(infoset)
 
-    def short_str(self) -> str:
-        s = f"=== {PID_TO_CARDINAL[self.player]}\n"
+    def short_lines(self):
+        """
+        Lines of short_str, generated one at a time
+        """
+        yield f"=== {PID_TO_CARDINAL[self.player]}"
         for infoset in self.infosets:
-            s += "{}\n".format(infoset.short_str())
-        return s
+            yield infoset.short_str()
+
+    def __str__(self):
+        return "".join(line + "\n" for line in self.lines())
+
+    def short_str(self) -> str:
+        return "".join(line + "\n" for line in self.short_lines())
 
     @staticmethod
     def validate(infosets: List[Infoset]) -> int:
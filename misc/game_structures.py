@@ -87,12 +87,60 @@ PlayerId = int
 # ======================================================================================================================
 
 
+# order of the ranks inside a suit: the 2 is the lowest card (0), the ace the highest (12)
+RANK_STRENGTH = {rank: (rank + 11) % 13 for rank in range(1, 14)}
+
+
 class Card:
-    def __init__(self, suit: Suit, rank: int):
-        assert rank > 0, "cannot create a card with non-positive rank"
-        assert suit != Suit.notrump, "cannot create a card with no suit"
-        self.rank = rank
-        self.suit = suit
+    """
+    Cards are interned: Card(suit, rank) always returns the same object for a given card, so cards compare by identity
+    and every card carries its precomputed integers.
+    index is the position of the card in a 52 cards deck sorted by suit, then by strength (see RANK_STRENGTH); cards
+    are ordered by index. Card.from_index converts it back. Cards are immutable.
+    """
+    __slots__ = ('suit', 'rank', 'index', 'strength', '_hash')
+
+    _interned = {}
+    _by_index = [None] * 52
+
+    def __new__(cls, suit: Suit, rank: int):
+        card = cls._interned.get((suit, rank))
+        if card is None:
+            assert 0 < rank <= 13, "cannot create a card with non-positive rank"
+            assert suit != Suit.notrump, "cannot create a card with no suit"
+            card = object.__new__(cls)
+            object.__setattr__(card, 'suit', Suit(suit))
+            object.__setattr__(card, 'rank', rank)
+            object.__setattr__(card, 'strength', RANK_STRENGTH[rank])
+            object.__setattr__(card, 'index', card.suit * 13 + card.strength)
+            object.__setattr__(card, '_hash', rank + card.suit * 13)
+            cls._interned[(suit, rank)] = card
+            cls._by_index[card.index] = card
+        return card
+
+    def __setattr__(self, key, value):
+        raise AttributeError("cards are immutable")
+
+    def __reduce__(self):
+        # unpickled and copied cards are the interned ones
+        return Card, (self.suit, self.rank)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    @staticmethod
+    def from_index(index: int):
+        """
+        Card whose index is index
+        """
+        card = Card._by_index[index]
+        if card is None:
+            suit, strength = divmod(index, 13)
+            card = Card(Suit(suit), 1 if strength == 12 else strength + 2)
+        return card
 
     def compare_rank(self, obj: int) -> int:
         """
@@ -100,12 +148,8 @@ class Card:
         0 if equal
         -1 if lower
         """
-        def normalize_ace(a):
-            return a+13 if a == 1 else a
-        norm_self_rank = normalize_ace(self.rank)
-        norm_obj = normalize_ace(obj)
-
-        return 1 if norm_self_rank > norm_obj else (0 if norm_self_rank == norm_obj else -1)
+        other = RANK_STRENGTH[obj]
+        return 1 if self.strength > other else (0 if self.strength == other else -1)
 
     def compare_to(self, obj, leader: Suit, trump: Optional[Suit]) -> int:
         """
@@ -115,7 +159,7 @@ class Card:
         trump > leader > else
         """
         if self.suit == obj.suit:
-            return self.compare_rank(obj.rank)
+            return 1 if self.strength > obj.strength else (0 if self.strength == obj.strength else -1)
 
         # different suits -> trump wins
         if self.suit == trump:
@@ -129,7 +173,7 @@ class Card:
         if obj.suit == leader:
             return -1
 
-        return self.compare_rank(obj.rank)
+        return 1 if self.strength > obj.strength else (0 if self.strength == obj.strength else -1)
 
     @staticmethod
     def are_consecutive(card1, card2, ranks=13) -> bool:
@@ -191,14 +235,13 @@ class Card:
         return self.short_string()
 
     def __lt__(self, other):
-        return self.suit < other.suit or (other.compare_rank(self.rank) == 1 and self.suit == other.suit)
+        return self.index < other.index
 
     def __eq__(self, other):
-        return self.suit == other.suit and self.rank == other.rank
+        return self is other or (isinstance(other, Card) and self.index == other.index)
 
-    # noinspection PyTypeChecker
     def __hash__(self):
-        return self.rank + self.suit * 13
+        return self._hash
 
 
 # ======================================================================================================================
@@ -1,9 +1,10 @@
 from typing import Dict, List
+import itertools
 import random
+import sys
 
 from misc.game_structures import Card, Deck
 from misc.game_structures import PlayerId, gen_short_hand_desc
-import copy
 
 
 def compare_hands(h1: Dict[PlayerId, List[Card]], h2: Dict[PlayerId, List[Card]]):
@@ -17,97 +18,234 @@ def compare_hands(h1: Dict[PlayerId, List[Card]], h2: Dict[PlayerId, List[Card]]
     return True
 
 
-def generate_hands(n_players, ranks, game_number=1):
+# Deal indexing: a deal is numbered by the combinations of cards of each hand, in player order. The first hand is one of
+# the C(N, h) combinations of the N cards of the deck, the second one of the C(N-h, h) combinations of the cards left
+# and so on, so deal_count = C(N, h) * C(N-h, h) * ... and the number of a deal is written in this mixed radix.
+# Combinations are numbered in lexicographic order of the positions of their cards in the sorted deck, the order of
+# itertools.combinations, so iter_deals enumerates the deals in the order of their numbers. HandCombinations applies the
+# same numbering to any set of cards, e.g. the cards left once some hands are fixed.
+
+_binomials = [[1]]
+
+
+def _binomial(n, k) -> int:
+    while len(_binomials) <= n:
+        row = _binomials[-1]
+        _binomials.append([1] + [row[i] + row[i + 1] for i in range(len(row) - 1)] + [1])
+    if k < 0 or k > n:
+        return 0
+    return _binomials[n][k]
+
+
+def _rank_combination(positions: List[int], n) -> int:
     """
-    Generate a game given the number of players and the number of cards per suit.
-    Returns a dictionary of hands, cards are ordered by rank.
-    The keys are the players ids (0, 1, 2, ...).
+    Number of the combination of k of the n positions (sorted), lexicographic order
     """
-    def generate_hands_mono(n_players, ranks) -> Dict[PlayerId, List[Card]]:
-        assert (ranks*4)%n_players == 0, "ERROR: choose a rank number such that each player has the same amount of cards"
-
-        cards = Deck(ranks).cards
-        deck = set()
-        hands = {}
-        for p in range(n_players):
-            hands[p] = []
-
-        # Creating a dictionary of cards
-        for card in cards:
-            deck.add(card)
-
-        # Extracting the players cards
-        while len(deck) != 0:
-            for player in range(n_players):
-                if len(deck) != 0:
-                    card = random.choice(list(deck))
-                    hands[player].append(card)
-                    deck.remove(card)
-
-        # assert all cards have been dealt
-        tot = 0
-        for p in range(n_players):
-            tot += len(hands[p])
-        assert tot == ranks * 4, "card dealing error"
-
-        # Sorting cards
-        for player in hands.keys():
-            hands[player].sort()
-
+    k = len(positions)
+    index = 0
+    start = 0
+    for i, position in enumerate(positions):
+        # combinations with a lower position in place i
+        for x in range(start, position):
+            index += _binomial(n - x - 1, k - i - 1)
+        start = position + 1
+    return index
+
+
+def _unrank_combination(index, n, k) -> List[int]:
+    """
+    Sorted positions of the combination number index of k of n positions, lexicographic order
+    """
+    positions = []
+    x = 0
+    for i in range(k):
+        count = _binomial(n - x - 1, k - i - 1)
+        while index >= count:
+            index -= count
+            x += 1
+            count = _binomial(n - x - 1, k - i - 1)
+        positions.append(x)
+        x += 1
+    return positions
+
+
+class HandCombinations:
+    """
+    All the ways to deal cards (sorted) to n_hands hands of hand_size cards each, numbered as explained above: the
+    combinations are never stored, they are computed from their number (index access) or enumerated lazily (iteration).
+    Items are lists of hands, each hand a sorted list of cards
+    """
+    def __init__(self, cards: List[Card], n_hands, hand_size):
+        assert len(cards) == n_hands * hand_size, "ERROR: the cards cannot be split in hands of the same size"
+        self.cards = list(cards)
+        self.n_hands = n_hands
+        self.hand_size = hand_size
+
+        # number of combinations of the hands from i on
+        self._radix = [_binomial(len(cards) - i * hand_size, hand_size) for i in range(n_hands)]
+        self._count = 1
+        for radix in self._radix:
+            self._count *= radix
+
+    def __len__(self):
+        # may not fit in a ssize_t, use count() for large decks
+        return self._count
+
+    def count(self) -> int:
+        return self._count
+
+    def __getitem__(self, index) -> List[List[Card]]:
+        assert 0 <= index < self._count, "ERROR: combination number out of range"
+        # digits of index, the last hand first
+        hand_indexes = []
+        for radix in reversed(self._radix):
+            index, hand_index = divmod(index, radix)
+            hand_indexes.append(hand_index)
+        hand_indexes.reverse()
+
+        hands = []
+        remaining = list(self.cards)
+        for hand_index in hand_indexes:
+            positions = _unrank_combination(hand_index, len(remaining), self.hand_size)
+            hands.append([remaining[x] for x in positions])
+            for x in reversed(positions):
+                del remaining[x]
         return hands
 
-
-    hands_list = []
-
-    for i in range(game_number):
-        duplicate = True
-        hands = 0
-        while duplicate:
-            duplicate = False
-            hands = generate_hands_mono(n_players, ranks)
-            for elem in hands_list:
-                if compare_hands(elem, hands):
-                    duplicate = True
-
-        hands_list.append(hands)
-
-    return hands_list
-
-
-def _get_all_combinations_for_one_hand(cards, hand_size):
-    result = []
-    for i in range(2 ** len(cards)):
-        bit_str = bin(i)[2:]
-        if bit_str.count('1') == hand_size:
-            l = []
-            for idx, bit in enumerate(bit_str[::-1]):
-                if bit == '1':
-                    l.append(cards[idx])
-            result.append(l)
-    return result
-
-
-def _gen_hand_combinations(remaining_cards, cards_to_extract):
-    result = []
-    draws = _get_all_combinations_for_one_hand(remaining_cards, cards_to_extract)
-    for draw in draws:
-        # create a new remaining_cards list without those cards
-        new_remaining = copy.copy(remaining_cards)
-        for card in draw:
-            new_remaining.remove(card)
-        if len(new_remaining) != 0:
-            combos = _gen_hand_combinations(new_remaining, cards_to_extract)
-            for combo in combos:
-                res = [draw]
-                for hand in combo:
-                    res.append(hand)
-                result.append(res)
+    def index(self, hands: List[List[Card]]) -> int:
+        """
+        Number of a combination, the inverse of __getitem__
+        """
+        remaining = list(self.cards)
+        index = 0
+        for radix, hand in zip(self._radix, hands):
+            positions = sorted(remaining.index(card) for card in hand)
+            index = index * radix + _rank_combination(positions, len(remaining))
+            for x in reversed(positions):
+                del remaining[x]
+        return index
+
+    def __iter__(self):
+        """
+        Enumerate the combinations lazily, in the order of their numbers
+        """
+        def deal_rest(remaining, hand_id):
+            if hand_id == self.n_hands - 1:
+                yield [remaining]
+                return
+            for positions in itertools.combinations(range(len(remaining)), self.hand_size):
+                hand = [remaining[x] for x in positions]
+                chosen = set(positions)
+                rest = [card for x, card in enumerate(remaining) if x not in chosen]
+                for hands in deal_rest(rest, hand_id + 1):
+                    yield [hand] + hands
+
+        if self.n_hands == 0:
+            yield []
+            return
+        yield from deal_rest(self.cards, 0)
+
+    def sample(self, k, rng=random) -> List[List[List[Card]]]:
+        """
+        k different combinations chosen uniformly at random, all of them (in random order) if k >= count
+        """
+        k = min(k, self._count)
+        if self._count <= sys.maxsize:
+            indexes = rng.sample(range(self._count), k)
         else:
-            result.append([draw])
-    return result
+            # range too large for sample, collisions are almost impossible
+            indexes = []
+            drawn = set()
+            while len(indexes) < k:
+                index = rng.randrange(self._count)
+                if index not in drawn:
+                    drawn.add(index)
+                    indexes.append(index)
+        return [self[index] for index in indexes]
+
+
+def reservoir_sample(iterable, k, rng=random) -> list:
+    """
+    k items chosen uniformly at random from an iterable of unknown length, in one pass and keeping only k items in
+    memory (all the items if there are fewer than k)
+    """
+    reservoir = []
+    for seen, item in enumerate(iterable):
+        if seen < k:
+            reservoir.append(item)
+        else:
+            j = rng.randrange(seen + 1)
+            if j < k:
+                reservoir[j] = item
+    return reservoir
+
+
+def _sorted_deck(ranks) -> List[Card]:
+    return sorted(Deck(ranks).cards)
+
+
+def _deal_combinations(n_players, ranks) -> HandCombinations:
+    assert (ranks*4) % n_players == 0, "ERROR: choose a rank number such that each player has the same amount of cards"
+    return HandCombinations(_sorted_deck(ranks), n_players, ranks * 4 // n_players)
+
+
+def deal_count(n_players, ranks) -> int:
+    """
+    Number of different deals of a deck with ranks cards per suit among n_players
+    """
+    return _deal_combinations(n_players, ranks).count()
+
+
+def unrank_deal(index, n_players, ranks) -> Dict[PlayerId, List[Card]]:
+    """
+    Deal number index (0 <= index < deal_count), hands sorted
+    """
+    return dict(enumerate(_deal_combinations(n_players, ranks)[index]))
+
+
+def rank_deal(hands: Dict[PlayerId, List[Card]], ranks) -> int:
+    """
+    Number of a deal, the inverse of unrank_deal
+    """
+    n_players = len(hands)
+    return _deal_combinations(n_players, ranks).index([hands[p] for p in range(n_players)])
+
+
+def iter_deals(n_players, ranks):
+    """
+    Lazily enumerate every deal, in the order of their numbers (only practical for small ranks, see deal_count)
+    """
+    for hands in _deal_combinations(n_players, ranks):
+        yield dict(enumerate(hands))
+
+
+def sample_deals(n_players, ranks, game_number=1, rng=random):
+    """
+    game_number different deals chosen uniformly at random, hands sorted. Deals are drawn by number, so duplicates are
+    excluded without comparing hands; if game_number is larger than the number of deals, all of them are returned
+    """
+    combinations = _deal_combinations(n_players, ranks)
+    if game_number > combinations.count():
+        print("WARNING: the number of games requested is greater than the possible number of games that can"
+              f" be generated, only {combinations.count()} games will be generated")
+    return [dict(enumerate(hands)) for hands in combinations.sample(game_number, rng)]
+
+
+def generate_hands(n_players, ranks, game_number=1):
+    """
+    Generate a game given the number of players and the number of cards per suit.
+    Returns a list of game_number different dictionaries of hands, cards are ordered by rank.
+    The keys are the players ids (0, 1, 2, ...).
+    """
+    return sample_deals(n_players, ranks, game_number)
 
 
 def generate_hands_fixed(n_players, ranks, declarer, fix_dummy=True, game_number=1):
+    """
+    Generate game_number different games where the hand of the declarer (and of the dummy if fix_dummy) is the same:
+    it is sampled once, then the remaining cards are dealt to the other players. The deals of the remaining cards are
+    drawn by number from a HandCombinations, so they are never all generated
+    """
     assert 1 < n_players < 5, "ERROR: invalid number of players, only 2, 3 and 4 players are supported"
     assert declarer < n_players, "ERROR: invalid declarer id"
     assert (ranks * 4) % n_players == 0, \
@@ -125,97 +263,41 @@ def generate_hands_fixed(n_players, ranks, declarer, fix_dummy=True, game_number
     if dummy >= n_players:
         dummy = -1
 
-    deck = set(Deck(ranks).cards)
-    games = []
-
+    deck = _sorted_deck(ranks)
     cards_per_hand = int((ranks * 4) / n_players)
 
-    declarer_hand = []
-
-    # generate declarer's hand
-    for i in range(cards_per_hand):
-        card = random.sample(deck, 1)[0]
-        declarer_hand.append(card)
-        deck.remove(card)
-    declarer_hand.sort()
-
-    # sample dummy's hand
+    # sample declarer's hand and dummy's hand
+    declarer_hand = sorted(random.sample(deck, cards_per_hand))
+    deck = [card for card in deck if card not in declarer_hand]
     dummy_hand = []
     if dummy != -1 and fix_dummy:
-        for i in range(cards_per_hand):
-            card = random.sample(deck, 1)[0]
-            dummy_hand.append(card)
-            deck.remove(card)
-    dummy_hand.sort()
+        dummy_hand = sorted(random.sample(deck, cards_per_hand))
+        deck = [card for card in deck if card not in dummy_hand]
 
     other_players = set(range(n_players))
     other_players.remove(declarer)
     if dummy in other_players:
         other_players.remove(dummy)
+    other_players = sorted(other_players)
 
     if len(other_players) < 2:
         print(f"games will be reduced to 1 because sampling will always give the same result "
               f"({len(other_players)} hands to sample)")
         game_number = 1
 
-    # IF RANKS <= 3: there are few possible game to generate, so it's better to create all possible hand
-    # assignments and sample some of them
-    if ranks <= 3:
-        combos = _gen_hand_combinations(list(deck), cards_per_hand)
-
-        if game_number < len(combos):
-            # sample games
-            games_sampled = random.sample(combos, game_number)
-            for combo in games_sampled:
-                hands = {declarer: declarer_hand}
-                if dummy != -1 and fix_dummy:
-                    hands[dummy] = dummy_hand
-                for idx, op in enumerate(other_players):
-                    hands[op] = sorted(combo[idx])
-                games.append(hands)
-        else:
-            if game_number > 1:
-                print("WARNING: the number of games requested is greater than the possible number of games that can"
-                      f" be generated, only {len(combos)} games will be generated")
-            for combo in combos:
-                hands = {declarer: declarer_hand}
-                if dummy != -1 and fix_dummy:
-                    hands[dummy] = dummy_hand
-                for idx, op in enumerate(other_players):
-                    hands[op] = sorted(combo[idx])
-                games.append(hands)
-
-    # IF RANKS > 3: we can sample hands and compare them with the other sampled hands, if a combination was already
-    # extracted, try again
-    else:
-        for game_id in range(game_number):
-            duplicate = True
-            while duplicate:
-                hands = {declarer: declarer_hand}
-                if dummy != -1 and fix_dummy:
-                    hands[dummy] = dummy_hand
-
-                new_deck = copy.copy(deck)
-
-                for pl in other_players:
-                    hands[pl] = []
-                    for i in range(cards_per_hand):
-                        c = random.sample(new_deck, 1)[0]
-                        hands[pl].append(c)
-                        new_deck.remove(c)
-
-                # Sorting cards
-                for hand in hands.values():
-                    hand.sort()
-
-                duplicate = False
-                for game in games:
-                    if compare_hands(game, hands):
-                        # dup
-                        duplicate = True
-                if len(games) == 0 or not duplicate:
-                    games.append(hands)
-                    duplicate = False
+    combinations = HandCombinations(deck, len(other_players), cards_per_hand)
+    if game_number > combinations.count():
+        print("WARNING: the number of games requested is greater than the possible number of games that can"
+              f" be generated, only {combinations.count()} games will be generated")
+
+    games = []
+    for combo in combinations.sample(game_number):
+        hands = {declarer: declarer_hand}
+        if dummy != -1 and fix_dummy:
+            hands[dummy] = dummy_hand
+        for idx, op in enumerate(other_players):
+            hands[op] = combo[idx]
+        games.append(hands)
 
     return games
 